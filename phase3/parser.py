@@ -2,9 +2,12 @@ import sys
 from lexer import getNextToken
 
 class Parser:
-    def __init__(self):
+    def __init__(self, tracer=None):
         # lookahead
         self.current = getNextToken()
+        # trace sink (see tracesink.py), default prints the trace
+        if tracer is not None:
+            self.trace = tracer.trace
 
     def error(self, msg):
         print(f"Parse error: {msg}, got {self.current['token']}")
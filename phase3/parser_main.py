@@ -1,13 +1,52 @@
+import io
 import sys, os
 from lexer import initLexer
 from parser import Parser
+from tracesink import NullTrace, CountingTrace, BufferedTrace
+
+USAGE = """Usage: python3 parser_main.py [--trace=MODE] <source_file.rsc>
+       python3 parser_main.py --trace=off <source_file.rsc> ...
+trace modes (written to <source_file>.rsp)
+  full      the trace, one print per production (default)
+  buffered  the same trace, written in large chunks
+  compact   production ids instead of text (python3 tracesink.py expands it)
+  count     how often each production was applied
+  off       no trace and no .rsp, OK or the error for each file"""
+
+# check the syntax of src, returns "OK" or what the lexer/parser printed
+def check(src, parser_class, tracer):
+    old_stdout = sys.stdout
+    out = io.StringIO()
+    try:
+        sys.stdout = out
+        initLexer(src)
+        parser_class(tracer).parse_Program()
+    except SystemExit:
+        pass
+    finally:
+        sys.stdout = old_stdout
+    return out.getvalue().strip() or "OK"
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python3 parser_main.py <source_file.rsc>")
+    args = sys.argv[1:]
+    mode = 'full'
+    if args and args[0].startswith('--trace='):
+        mode = args[0].split('=', 1)[1]
+        args = args[1:]
+    if mode not in ('full', 'buffered', 'compact', 'count', 'off') \
+            or not args or (len(args) != 1 and mode != 'off'):
+        print(USAGE)
         sys.exit(1)
 
-    src = sys.argv[1]
+    if mode == 'off':
+        failed = False
+        for src in args:
+            result = check(src, Parser, NullTrace())
+            print(f"{src}: {result}")
+            failed = failed or result != "OK"
+        sys.exit(1 if failed else 0)
+
+    src = args[0]
     if not initLexer(src):
         print(f"Failed to open file: {src}")
         sys.exit(1)
@@ -15,15 +54,29 @@ def main():
     base, _ = os.path.splitext(src)
     outname = base + '.rsp'
 
-    parser = Parser()
+    tracer = CountingTrace() if mode == 'count' else None
+    parser = Parser(tracer) if mode in ('full', 'count') else None
 
     old_stdout = sys.stdout
     outf = open(outname, 'w')
+    sink = outf
+    if parser is None:
+        # printed errors go through the buffer too, after the trace so far
+        tracer = sink = BufferedTrace(outf, compact=mode == 'compact')
+        parser = Parser(tracer)
+
     try:
-        sys.stdout = outf
+        sys.stdout = sink
         parser.parse_Program()
+        if mode == 'count':
+            counts = sorted(tracer.counts.items(), key=lambda item: (-item[1], item[0]))
+            for production, count in counts:
+                print(f"{count} {production}")
+            print(f"{tracer.total()} productions")
     finally:
         sys.stdout = old_stdout
+        if tracer is not None:
+            tracer.close()
         outf.close()
 
     print(f"Output file: {outname}")
@@ -0,0 +1,108 @@
+# tracesink.py
+# sinks for the parser's production trace: Parser(tracer) hands every
+# production it applies to tracer.trace(production) instead of printing it
+#
+#   NullTrace     : off, productions are dropped
+#   CountingTrace : only counts how often each production is applied
+#   BufferedTrace : writes the trace in large chunks, as text or (compact)
+#                   as production ids
+#
+#   python3 tracesink.py <rsp file>    expands a compact trace to text
+import sys
+
+class NullTrace:
+    def trace(self, production):
+        pass
+
+    def close(self):
+        pass
+
+class CountingTrace:
+    def __init__(self):
+        self.counts = {}
+
+    def trace(self, production):
+        counts = self.counts
+        counts[production] = counts.get(production, 0) + 1
+
+    def total(self):
+        return sum(self.counts.values())
+
+    def close(self):
+        pass
+
+class BufferedTrace:
+    """
+    collects trace lines and writes them to out once buffer_size characters
+    have piled up (and on flush/close)
+    it is file-like too, so it can stand in for sys.stdout: anything printed
+    meanwhile (error messages) lands in the same buffer, in order
+    compact: the first time a production is applied its definition line
+        =<id> <production>
+    is written, after that only its id; lines that are neither are
+    printed text.  expand() turns this back into the full trace
+    """
+
+    def __init__(self, out, buffer_size=1 << 20, compact=False):
+        self.out = out
+        self.buffer_size = buffer_size
+        self.compact = compact
+        self.lines = []
+        self.size = 0
+        self.ids = {}           # production => its id line
+
+    def trace(self, production):
+        if self.compact:
+            ids = self.ids
+            line = ids.get(production)
+            if line is None:
+                id = len(ids)
+                ids[production] = f"{id}\n"
+                line = f"={id} {production}\n"
+        else:
+            line = production + '\n'
+        self.lines.append(line)
+        self.size += len(line)
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def write(self, text):
+        self.lines.append(text)
+        self.size += len(text)
+        if self.size >= self.buffer_size:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        if self.lines:
+            self.out.write(''.join(self.lines))
+            self.lines = []
+            self.size = 0
+
+    def close(self):
+        self.flush()
+
+# the text lines of a compact trace
+def expand(lines):
+    productions = {}
+    for line in lines:
+        line = line.rstrip('\n')
+        if line.isdigit():
+            yield productions[line]
+        elif line.startswith('=') and ' ' in line and line[1:line.index(' ')].isdigit():
+            id, production = line[1:].split(' ', 1)
+            productions[id] = production
+            yield production
+        else:
+            yield line
+
+def main():
+    if len(sys.argv) != 2:
+        print("Usage: python3 tracesink.py <rsp file>")
+        sys.exit(1)
+    with open(sys.argv[1], 'r') as f:
+        for line in expand(f):
+            print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# codegen.py
+# IR generation from the tree built by tree.TreeParser
+# produces the same IRCode (quads, temporaries and labels numbered the same)
+# as the single-pass Parser does for the program
+from compiler import IRCode, ExprAttr
+from parser import BINARY_OPERATORS
+from tree import (DECL, FUNCDECL, BLOCK,
+                  WHILESTMT, IFSTMT, ASSIGNSTMT, PRINTSTMT, READSTMT,
+                  RETURNSTMT, CALLSTMT,
+                  BINARY, NEGATE, INTLIT, FLOATLIT, VARIABLE, CALLEXPR)
+
+class CodeGenerator:
+    def __init__(self, arena, IR=None):
+        self.arena = arena
+        self.IR = IR if IR is not None else IRCode()
+        self.values = arena.values
+
+    # IR for the whole program (arena.root), returns the IRCode
+    def generate(self):
+        arena = self.arena
+        values = self.values
+        IR = self.IR
+        IR.emit_data_segment()
+        IR.emit_text_segment()
+        for n in arena.kids(arena.root):
+            kind = arena.kinds[n]
+            if kind == DECL:
+                self.decl(n)
+            elif kind == FUNCDECL:
+                IR.emit('.label', 0, 0, values[arena.a[n]])
+                self.body(n)
+                IR.emit('return', 0, 0, 0)
+            else:
+                IR.emit('.label', 0, 0, 'main')
+                self.body(n)
+                IR.emit('halt', 0, 0, 0)
+        return IR
+
+    def decl(self, n):
+        arena = self.arena
+        values = self.values
+        directive = '.int' if values[arena.b[n]] == 'INT' else '.float'
+        self.IR.emit_data_directive(directive, values[arena.c[n]], values[arena.a[n]])
+
+    # declarations and statements under n, in order
+    def body(self, n):
+        arena = self.arena
+        kinds = arena.kinds
+        for s in arena.kids(n):
+            if kinds[s] == DECL:
+                self.decl(s)
+            else:
+                self.statement(s)
+
+    def statement(self, n):
+        arena = self.arena
+        IR = self.IR
+        kind = arena.kinds[n]
+        kids = arena.kids(n)
+
+        if kind == WHILESTMT:
+            cond = self.expression(kids[0])
+            start = IR.new_label(); end = IR.new_label()
+            IR.emit('.label', 0, 0, start)
+            IR.emit('beq', cond.location, 0, end)
+            self.body(kids[1])
+            IR.emit('j', 0, 0, start)
+            IR.emit('.label', 0, 0, end)
+
+        elif kind == IFSTMT:
+            cond = self.expression(kids[0])
+            els = IR.new_label(); end = IR.new_label()
+            IR.emit('beq', cond.location, 0, els)
+            self.body(kids[1])
+            IR.emit('j', 0, 0, end)
+            IR.emit('.label', 0, 0, els)
+            if len(kids) > 2:
+                self.body(kids[2])
+            IR.emit('.label', 0, 0, end)
+
+        elif kind == ASSIGNSTMT:
+            lhs = self.expression(kids[0])
+            rhs = self.expression(kids[1])
+            IR.emit('sw' if rhs.type == 'INT' else 'fsw', rhs.location, 0, lhs.location)
+
+        elif kind == PRINTSTMT:
+            expr = self.expression(kids[0])
+            IR.emit('syscall', 2 if expr.type == 'INT' else 4, expr.location, 0)
+
+        elif kind == READSTMT:
+            lhs = self.expression(kids[0])
+            trap = 1 if lhs.type == 'INT' else 3
+            tmp = IR.new_temp() if lhs.type == 'INT' else IR.new_ftemp()
+            IR.emit('syscall', trap, tmp, 0)
+            IR.emit('sw' if lhs.type == 'INT' else 'fsw', tmp, 0, lhs.location)
+
+        elif kind == RETURNSTMT:
+            if kids:
+                expr = self.expression(kids[0])
+                IR.emit('return', expr.location, 0, 0)
+
+        elif kind == CALLSTMT:
+            args = [self.expression(arg) for arg in kids]
+            for arg in args:
+                IR.emit('param', arg.location, 0, 0)
+            IR.emit('call', self.values[arena.a[n]], len(args), 0)
+
+        elif kind == BLOCK:
+            self.body(n)
+
+    # ExprAttr of expression n
+    # walks the expression post-order with an explicit stack (every node's
+    # code follows its operands' code), so deep trees do not recurse
+    def expression(self, n):
+        arena = self.arena
+        kinds = arena.kinds
+        first = arena.first
+        last = arena.last
+        children = arena.children
+        values = self.values
+        IR = self.IR
+        results = []
+        stack = [n]
+        while stack:
+            n = stack.pop()
+            if n >= 0 and first[n] != last[n]:
+                # operands first, n again (as ~n) once they are done
+                stack.append(~n)
+                stack.extend(reversed(children[first[n]:last[n]]))
+                continue
+            if n < 0:
+                n = ~n
+            kind = kinds[n]
+
+            if kind == BINARY:
+                right = results.pop()
+                left = results.pop()
+                prec, right_assoc, instr, emit = BINARY_OPERATORS[arena.a[n]]
+                results.append(emit(IR, instr, left, right))
+
+            elif kind == VARIABLE:
+                location = values[arena.a[n]]
+                typ = values[arena.b[n]]
+                if first[n] != last[n]:
+                    idx = results.pop()
+                    base = IR.new_temp()
+                    IR.emit('la', location, 0, base)
+                    off = IR.new_temp()
+                    IR.emit('mul', idx.location, 4, off)
+                    addr = IR.new_temp()
+                    IR.emit('add', base, off, addr)
+                else:
+                    addr = IR.new_temp()
+                    IR.emit('la', location, 0, addr)
+                if typ == 'INT':
+                    val = IR.new_temp()
+                    IR.emit('lw', addr, 0, val)
+                else:
+                    val = IR.new_ftemp()
+                    IR.emit('flw', addr, 0, val)
+                results.append(ExprAttr(typ, val))
+
+            elif kind == INTLIT:
+                temp = IR.new_temp()
+                IR.emit('li', values[arena.a[n]], 0, temp)
+                results.append(ExprAttr('INT', temp))
+
+            elif kind == FLOATLIT:
+                temp = IR.new_ftemp()
+                IR.emit('fl', values[arena.a[n]], 0, temp)
+                results.append(ExprAttr('FLOAT', temp))
+
+            elif kind == NEGATE:
+                expr = results.pop()
+                instr = 'sub' if expr.type == 'INT' else 'fsub'
+                dest = IR.new_temp() if expr.type == 'INT' else IR.new_ftemp()
+                IR.emit(instr, 0, expr.location, dest)
+                results.append(ExprAttr(expr.type, dest))
+
+            elif kind == CALLEXPR:
+                count = last[n] - first[n]
+                args = results[len(results) - count:]
+                del results[len(results) - count:]
+                for arg in args:
+                    IR.emit('param', arg.location, 0, 0)
+                ret = IR.new_temp()
+                IR.emit('call', values[arena.a[n]], count, ret)
+                results.append(ExprAttr('INT', ret))
+        return results[0]
@@ -32,6 +32,35 @@ class IRCode:
     def emit(self, op, arg1, arg2, res):
         self.quads.append((op, str(arg1), str(arg2), str(res)))
 
+    # INT op FLOAT: the INT operand is converted with tf
+    def coerce(self, left, right):
+        if left.type != right.type:
+            tmp = self.new_ftemp()
+            if left.type == 'INT':
+                self.emit('tf', left.location, 0, tmp)
+                left = ExprAttr('FLOAT', tmp)
+            else:
+                self.emit('tf', right.location, 0, tmp)
+                right = ExprAttr('FLOAT', tmp)
+        return left, right
+
+    # + - * / : operands coerced to a common type, f-prefixed on FLOAT
+    def emit_arithmetic(self, instr, left, right):
+        left, right = self.coerce(left, right)
+        if left.type == 'FLOAT':
+            instr = 'f' + instr
+            dest = self.new_ftemp()
+        else:
+            dest = self.new_temp()
+        self.emit(instr, left.location, right.location, dest)
+        return ExprAttr(left.type, dest)
+
+    # relational and boolean operators: INT result, operands as they are
+    def emit_compare(self, instr, left, right):
+        dest = self.new_temp()
+        self.emit(instr, left.location, right.location, dest)
+        return ExprAttr('INT', dest)
+
     # emit a data-segment directive (.int or .float)
     def emit_data_directive(self, directive, count, name):
         self.data_quads.append((directive, '0', str(count), name))
@@ -0,0 +1,210 @@
+# incremental.py
+# incremental compile at function granularity
+#
+# the IR of every function (and main) is kept in a cache directory as a
+# fragment, keyed by a hash of the function's source text and of what its
+# IR depends on outside it: the global symbols and the function
+# signatures, for the names the function mentions (not where the function
+# is in the program: moving it around keeps its fragment).  a recompile lexes and
+# pre-scans the program and parses the global declarations (parallel.py),
+# then parses only the functions whose key is not in the cache - the ones
+# edited, and the ones whose globals or callees changed.  the fragments
+# are joined with their temporaries and labels renumbered, so the IR is
+# the same as a full compile's.
+#
+# the token stream is not lexed from scratch either: the text and tokens
+# of the last compile of each source file are kept, and relex() lexes only
+# the part the edit changed.
+#
+# files in the cache directory, data only (nothing in them is executed
+# when they are read back)
+#   <sha256>.frag : JSON [data_quads, quads, temps, ftemps, labels] as
+#                   compile_unit returns them, for one function
+#   <sha256>.snap : the text of a source file (its UTF-8 length as a
+#                   64-bit integer, then the bytes) and its tokens in the
+#                   token cache's entry format, keyed by the file's
+#                   absolute path
+# the keys of both hash the lexer version too.  only functions without
+# errors are stored; a program with errors goes through the Parser, which
+# reports them all
+import hashlib
+import json
+import os
+import re
+import struct
+
+from lexer import LEXER_VERSION, tokenize_all, relex
+from parallel import MIN_PARALLEL_TOKENS, split_program, compile_units, join
+from tokencache import evict, pack_tokens, unpack_tokens
+
+# version of the fragments; bump it whenever the IR a function compiles
+# to changes
+FRAGMENT_VERSION = '3'
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# length of the text at the start of a .snap file
+TEXT_SIZE = struct.Struct('<Q')
+
+# texts are compared this many characters at a time
+BLOCK = 4096
+
+# every name a function may mention (keywords and numbers too, which
+# are never global or function names)
+WORD_PATTERN = re.compile(r'\w+')
+
+class FragmentCache:
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.frag')
+
+    # fragment for key, None on a miss (missing or unreadable)
+    def load(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                data_quads, quads, temps, ftemps, labels = json.load(f)
+            fragment = ([tuple(quad) for quad in data_quads], [tuple(quad) for quad in quads],
+                        int(temps), int(ftemps), int(labels))
+        except (OSError, ValueError, TypeError):
+            return None
+        # mark as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return fragment
+
+    def store(self, key, fragment):
+        path = self.path(key)
+        temp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp, 'w') as f:
+                json.dump(fragment, f, separators=(',', ':'))
+            os.replace(temp, path)
+        except OSError:
+            # the cache is only an optimization
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+
+    # fragments and snapshots share the one budget
+    def evict(self):
+        evict(self.directory, ('.frag', '.snap'), self.max_bytes)
+
+    # token buffer of filename, relexed from the last one of the file
+    # where there is one (IOError if the file cannot be read)
+    def tokens(self, filename):
+        with open(filename, 'r') as f:
+            text = f.read()
+        key = hashlib.sha256(LEXER_VERSION.encode('ascii'))
+        key.update(os.path.abspath(filename).encode('utf-8', 'surrogatepass'))
+        path = os.path.join(self.directory, key.hexdigest() + '.snap')
+        buf = None
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            (size,) = TEXT_SIZE.unpack_from(data)
+            end = TEXT_SIZE.size + size
+            old_text = data[TEXT_SIZE.size:end].decode('utf-8', 'surrogatepass')
+            buf = unpack_tokens(memoryview(data)[end:], old_text)
+        except (OSError, ValueError, struct.error):
+            pass
+        if buf is not None and buf.text == text:
+            return buf
+        if buf is not None:
+            buf = relex(buf, *text_edit(buf.text, text))
+        else:
+            buf = tokenize_all(text)
+        temp = f"{path}.{os.getpid()}.tmp"
+        try:
+            encoded = text.encode('utf-8', 'surrogatepass')
+            with open(temp, 'wb') as f:
+                f.write(TEXT_SIZE.pack(len(encoded)))
+                f.write(encoded)
+                f.write(pack_tokens(buf))
+            os.replace(temp, path)
+        except OSError:
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+        return buf
+
+# text_edit
+# the edit that turns old into new, (offset, deleted, inserted) as relex
+# takes it: the texts are compared from both ends, BLOCK characters at a
+# time, then one at a time
+def text_edit(old, new):
+    size = min(len(old), len(new))
+    start = 0
+    while start + BLOCK <= size and old[start:start + BLOCK] == new[start:start + BLOCK]:
+        start += BLOCK
+    while start < size and old[start] == new[start]:
+        start += 1
+    # the common suffix does not reach into the common prefix
+    limit = size - start
+    old_end = len(old)
+    new_end = len(new)
+    suffix = 0
+    while (suffix + BLOCK <= limit and
+           old[old_end - suffix - BLOCK:old_end - suffix] == new[new_end - suffix - BLOCK:new_end - suffix]):
+        suffix += BLOCK
+    while suffix < limit and old[old_end - suffix - 1] == new[new_end - suffix - 1]:
+        suffix += 1
+    return start, old_end - start - suffix, new[start:new_end - suffix]
+
+# unit_keys
+# cache key of each unit of program (a SplitProgram)
+def unit_keys(program):
+    buffer = program.buffer
+    text = buffer.text
+    starts = buffer.starts
+    ends = buffer.ends
+    symbols = {name: (typ, location, dims) for name, typ, location, dims in program.symbols}
+    functions = program.functions
+    outside = symbols.keys() | set(functions)
+    keys = []
+    for start, end in program.units:
+        source = text[starts[start]:ends[end - 1]]
+        # global symbol and function signature of each outside name it
+        # mentions, and whether the function is declared before the unit
+        # (a name is only a function after its declaration)
+        names = outside.intersection(WORD_PATTERN.findall(source))
+        depends = sorted((name, symbols.get(name), functions.get(name),
+                          functions.declared(name, starts[start]))
+                         for name in names)
+        digest = hashlib.sha256(FRAGMENT_VERSION.encode('ascii'))
+        digest.update(LEXER_VERSION.encode('ascii'))
+        digest.update(source.encode('utf-8', 'surrogatepass'))
+        digest.update(repr(depends).encode('utf-8', 'surrogatepass'))
+        keys.append(digest.hexdigest())
+    return keys
+
+# compile_incremental
+# IRCode of the program in buffer with the unchanged functions taken from
+# cache (a FragmentCache); the others are compiled (in jobs processes if
+# there are enough of them) and stored.  None if the program has to go
+# through the Parser
+def compile_incremental(buffer, cache, jobs=0):
+    program = split_program(buffer)
+    if program is None:
+        return None
+    keys = unit_keys(program)
+    fragments = [cache.load(key) for key in keys]
+    missing = [k for k, fragment in enumerate(fragments) if fragment is None]
+    if missing:
+        units = program.units
+        if sum(units[k][1] - units[k][0] for k in missing) < MIN_PARALLEL_TOKENS:
+            jobs = 0
+        for k, fragment in zip(missing, compile_units(program, missing, jobs)):
+            if fragment is None:
+                return None
+            fragments[k] = fragment
+            cache.store(keys[k], fragment)
+        cache.evict()
+    return join(program, fragments)
@@ -1,39 +1,215 @@
+import mmap
+import os
+import re
 import sys
+from array import array
+from bisect import bisect_left, bisect_right
+
+import scantab
 
 # tokens
 
-# keywords
-KEYWORDS = {
-    'if':       'IF',          
-    'else':     'ELSE',        
-    'while':    'WHILE',       
-    'int':      'INT',         
-    'float':    'FLOAT',       
-    'void':     'VOID',        
-    'call':     'CALL',        
-    'print':    'PRINT',       
-    'read':     'READ',        
-    'function': 'FUNCTION',    
-    'main':     'MAIN',        
-    'return':   'RETURN'       
-}
+# version of the token stream (kinds, offsets); bump it whenever the lexer
+# changes what it produces, it keys the on-disk token cache (tokencache.py)
+LEXER_VERSION = '1'
+
+# token kinds
+# every token carries a small integer kind; TOKEN_NAMES maps it back to the
+# name used in the grammar and in error messages
+TOKEN_NAMES = (
+    'DD', 'ID', 'ICONST', 'FCONST',
+    'IF', 'ELSE', 'WHILE', 'INT', 'FLOAT', 'VOID', 'CALL', 'PRINT', 'READ',
+    'FUNCTION', 'MAIN', 'RETURN',
+    'SEMICOLON', 'LPAREN', 'RPAREN', 'COMMA', 'LBRACE', 'RBRACE',
+    'LBRACKET', 'RBRACKET',
+    'ASSIGN', 'EQUAL', 'LT', 'LE', 'GT', 'GE', 'NOT', 'NOTEQUAL',
+    'PLUS', 'MINUS', 'MULT', 'DIV', 'AND', 'OR'
+)
+(DD, ID, ICONST, FCONST,
+ IF, ELSE, WHILE, INT, FLOAT, VOID, CALL, PRINT, READ,
+ FUNCTION, MAIN, RETURN,
+ SEMICOLON, LPAREN, RPAREN, COMMA, LBRACE, RBRACE,
+ LBRACKET, RBRACKET,
+ ASSIGN, EQUAL, LT, LE, GT, GE, NOT, NOTEQUAL,
+ PLUS, MINUS, MULT, DIV, AND, OR) = range(len(TOKEN_NAMES))
+TOKEN_KINDS = {name: kind for kind, name in enumerate(TOKEN_NAMES)}
+
+class Token:
+    """
+    one token: integer kind, lexeme text and the source offset it starts at
+    ID tokens also carry sym, the id of their name in the lexer's NameTable
+    (-1 for every other token), and are spelled with its shared string
+    token['token'] / token['tokenText'] still work for the old dict interface
+    """
+    __slots__ = ('kind', 'text', 'pos', 'sym')
+
+    def __init__(self, kind, text, pos, sym=-1):
+        self.kind = kind
+        self.text = text
+        self.pos = pos
+        self.sym = sym
+
+    def __getitem__(self, key):
+        if key == 'token':
+            return TOKEN_NAMES[self.kind]
+        if key == 'tokenText':
+            return self.text
+        raise KeyError(key)
+
+    def __repr__(self):
+        return f"Token({TOKEN_NAMES[self.kind]}, {self.text!r}, {self.pos})"
+
+class NameTable:
+    """
+    per-compilation intern table for identifier names
+    every occurrence of a name gets the same str object and the same small
+    integer id, counted from 0 in the order the names are first seen, so
+    later dict lookups on names hit the cached hash and compare by identity
+    ids   : name => id
+    names : id => name
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def sym(self, name):
+        # id of name, a new one the first time it is seen
+        sym = self.ids.get(name)
+        if sym is None:
+            sym = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return sym
+
+class LineIndex:
+    """
+    line start offsets of one source (array('I')), so tokens only need to
+    carry offsets: the table is built on the first position() call - once
+    per source and never on the token path - and each lookup is a bisect
+    the source may be str text or a bytes buffer (offsets are bytes then)
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.starts = None
+
+    def build(self):
+        newline = '\n' if isinstance(self.source, str) else b'\n'
+        find = self.source.find
+        starts = array('I', [0])
+        pos = find(newline)
+        while pos >= 0:
+            starts.append(pos + 1)
+            pos = find(newline, pos + 1)
+        self.starts = starts
+
+    def position(self, offset):
+        # (line, column) of offset, both counted from 1
+        if self.starts is None:
+            self.build()
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
+
+# keywords and operators (punctuation too), lexeme => token name, as the
+# grammar's TERMINALS section spells them (scangen.py generates scantab.py
+# from it)
+KEYWORDS = scantab.KEYWORDS
+OPERATORS = scantab.OPERATORS
+
+# keyword and operator lexemes straight to their kinds
+KEYWORD_KINDS = {word: TOKEN_KINDS[name] for word, name in KEYWORDS.items()}
+OPERATOR_KINDS = {op: TOKEN_KINDS[name] for op, name in OPERATORS.items()}
+
+# kind => its one spelling, None for ID, ICONST and FCONST
+SPELLINGS = {kind: lexeme for lexeme, kind in (*KEYWORD_KINDS.items(), *OPERATOR_KINDS.items())}
+SPELLINGS[DD] = '$$'
+KIND_TEXTS = tuple(SPELLINGS.get(kind) for kind in range(len(TOKEN_NAMES)))
+
+# master pattern
+# skips white space, then matches exactly one lexeme; the named group that
+# matched tells getNextToken what it found.
+# comments only match their opening /* here, getNextToken skips to the */
+# identifiers and numbers must not run into a non-ascii character (which may
+# still belong to the lexeme for str.isalnum/str.isdigit).
+# anything the pattern cannot match (bad characters, non-ascii lexemes) is
+# handed to the character-at-a-time scanner.
+# the same source is compiled for str text and for bytes buffers; \x1c-\x1f
+# are white space for str.isspace but not for a bytes \s
+# operators: the longer ones first (so == is not read as = =), then one
+# class for the single characters
+OPERATOR_REGEX = '|'.join([re.escape(op) for op in OPERATORS if len(op) > 1] +
+                          ['[' + ''.join(re.escape(op) for op in OPERATORS if len(op) == 1) + ']'])
+TOKEN_REGEX = r'''
+    [\s\x1c-\x1f]*
+    (?:
+        (?P<ID>[A-Za-z_]\w*)(?!\w|[^\x00-\x7f])
+      | (?P<FNUM>[0-9]+\.[0-9]*)(?![0-9]|[^\x00-\x7f])
+      | (?P<INUM>[0-9]+)(?![0-9.]|[^\x00-\x7f])
+      | (?P<DOTNUM>\.[0-9]+)(?![0-9]|[^\x00-\x7f])
+      | (?P<COMMENT>/\*)
+      | (?P<OP>''' + OPERATOR_REGEX + r''')
+      | (?P<DD>\$\$)
+      | (?P<EOF>\Z)
+    )
+'''
+TOKEN_PATTERN = re.compile(TOKEN_REGEX, re.VERBOSE)
+BYTES_TOKEN_PATTERN = re.compile(TOKEN_REGEX.encode('ascii'), re.VERBOSE)
+
+# bytes buffers: operator lexeme => (kind, text) without decoding
+BYTES_OPERATORS = {op.encode('ascii'): (OPERATOR_KINDS[op], op) for op in OPERATORS}
+
+# one run of (ascii) white space followed by one run of anything else
+BYTES_WORD_PATTERN = re.compile(rb'[\s\x1c-\x1f]*[^\s\x1c-\x1f]*')
+
+# files at least this large are lexed from a memory map by initLexer
+MAPPED_LEXER_SIZE = 64 * 1024 * 1024
+
+# diagnostics
+# the lexer and the parser raise these instead of exiting, so a caller can
+# collect them (the parser records them and goes on, see Parser.recover)
+class CompileError(Exception):
+    """
+    one diagnostic
+    message      : what is wrong
+    pos          : source offset it was found at
+    line, column : the same place, 1-based
+    str() is the line the compiler prints for it
+    """
+
+    def __init__(self, message, pos, line, column):
+        super().__init__(message)
+        self.message = message
+        self.pos = pos
+        self.line = line
+        self.column = column
+
+class LexerError(CompileError):
+    def __str__(self):
+        return f"Lexer error: {self.message} at line {self.line}, column {self.column}"
 
 class Lexer:
-    def __init__(self,filename):
-        try:
+    def __init__(self, filename=None, text=None):
+        # source comes from the file, or straight from text when given
+        # (IOError if the file cannot be read)
+        if text is None:
             with open(filename, 'r') as f:
-                self.text = f.read()
-        except IOError:
-            print("error opening the file", filename)
-            sys.exit(1)
+                text = f.read()
+        self.text = text
+        self.names = NameTable()
+        self.lines = LineIndex(text)
         self.pos = 0
         # if there is text lex is filled with the current ch 
         # else theres nothing to process
         self.current_char = self.text[self.pos] if self.text else None
 
-    def error(self, message):
-        print("Lexer error:", message)
-        sys.exit(1)
+    def error(self, message, offset=None):
+        # offset defaults to the character being scanned, which is skipped:
+        # the next getNextToken goes on after it
+        if offset is None:
+            offset = self.pos
+            self.advance()
+        line, column = self.lines.position(offset)
+        raise LexerError(message, offset, line, column)
 
     # lexer advance
     def advance(self):
@@ -60,16 +236,26 @@ class Lexer:
     # identifiers
     def identifier(self):
         # return an identifier or keyword
+        start = self.pos
         result = ''
         # keywords and _
         while self.current_char is not None and (self.current_char.isalnum() or self.current_char == '_'):
             result += self.current_char
             self.advance()
-        token_type = KEYWORDS.get(result, 'ID')
-        return {'token': token_type, 'tokenText': result}
+        kind = KEYWORD_KINDS.get(result)
+        if kind is not None:
+            return Token(kind, result, start)
+        return self.nameToken(result, start)
+
+    # ID token for name, spelled with the shared string from the NameTable
+    def nameToken(self, name, start):
+        names = self.names
+        sym = names.sym(name)
+        return Token(ID, names.names[sym], start, sym)
     
     # integer and floating constant
     def number(self):
+        start = self.pos
         result = ''
         # collect the integer part
         while self.current_char is not None and self.current_char.isdigit():
@@ -84,11 +270,11 @@ class Lexer:
             while self.current_char is not None and self.current_char.isdigit():
                 result += self.current_char
                 self.advance()
-            token_type = 'FCONST'
+            token_type = FCONST
         else:
-            token_type = 'ICONST'
+            token_type = ICONST
 
-        return {'token': token_type, 'tokenText': result}
+        return Token(token_type, result, start)
     
     # skip comment = no token return
     def skip_comment(self):
@@ -110,13 +296,59 @@ class Lexer:
     
     def getNextToken(self):
         # scan the input and return the next token
+        # one regex match per token, the lexeme is sliced out of the text
+        text = self.text
+        pos = self.pos
+        while True:
+            m = TOKEN_PATTERN.match(text, pos)
+            if m is None:
+                return self.scanToken(pos)
+            kind = m.lastgroup
+            end = m.end()
+            if kind != 'COMMENT':
+                break
+            # skip past the closing */ (or to the end of an unterminated comment)
+            pos = text.find('*/', end)
+            pos = len(text) if pos < 0 else pos + 2
+        if kind == 'ID':
+            self.pos = end
+            lexeme = m.group('ID')
+            kind = KEYWORD_KINDS.get(lexeme)
+            if kind is not None:
+                return Token(kind, lexeme, end - len(lexeme))
+            return self.nameToken(lexeme, end - len(lexeme))
+        if kind == 'OP':
+            self.pos = end
+            lexeme = m.group('OP')
+            return Token(OPERATOR_KINDS[lexeme], lexeme, end - len(lexeme))
+        if kind == 'EOF':
+            self.pos = end
+            return Token(DD, '$$', end)
+        if kind == 'DD':
+            self.pos = end
+            return Token(DD, '$$', end - 2)
+        self.pos = end
+        lexeme = m.group(kind)
+        if kind == 'INUM':
+            return Token(ICONST, lexeme, end - len(lexeme))
+        if kind == 'FNUM':
+            return Token(FCONST, lexeme, end - len(lexeme))
+        # .5 => 0.5
+        return Token(FCONST, '0' + lexeme, end - len(lexeme))
+
+    # character-at-a-time scanner
+    # used from position pos for whatever the master pattern does not cover
+    def scanToken(self, pos):
+        self.pos = pos
+        self.current_char = self.text[pos] if pos < len(self.text) else None
         while self.current_char is not None:
+            start = self.pos
 
             # recognize explicit end-of-input marker $$
             if self.current_char == '$' and self.peek() == '$':
                 self.advance()
                 self.advance()
-                return {'token': 'DD', 'tokenText': '$$'}
+                return Token(DD, '$$', start)
 
             # skip white space
             if self.current_char.isspace():
@@ -130,33 +362,33 @@ class Lexer:
                     continue
                 else: # division /
                     self.advance()
-                    return {'token': 'DIV', 'tokenText':'/'}
+                    return Token(DIV, '/', start)
 
             # punctuation
             if self.current_char == ';':
                 self.advance()
-                return {'token': 'SEMICOLON', 'tokenText': ';'}
+                return Token(SEMICOLON, ';', start)
             if self.current_char == '(':
                 self.advance()
-                return {'token': 'LPAREN', 'tokenText': '('}
+                return Token(LPAREN, '(', start)
             if self.current_char == ')':
                 self.advance()
-                return {'token': 'RPAREN', 'tokenText': ')'}
+                return Token(RPAREN, ')', start)
             if self.current_char == ',':
                 self.advance()
-                return {'token': 'COMMA', 'tokenText': ','}
+                return Token(COMMA, ',', start)
             if self.current_char == '{':
                 self.advance()
-                return {'token': 'LBRACE', 'tokenText': '{'}
+                return Token(LBRACE, '{', start)
             if self.current_char == '}':
                 self.advance()
-                return {'token': 'RBRACE', 'tokenText': '}'}
+                return Token(RBRACE, '}', start)
             if self.current_char == '[':
                 self.advance()
-                return {'token': 'LBRACKET', 'tokenText': '['}
+                return Token(LBRACKET, '[', start)
             if self.current_char == ']':
                 self.advance()
-                return {'token': 'RBRACKET', 'tokenText': ']'}
+                return Token(RBRACKET, ']', start)
             
             # operators
             # = 
@@ -165,54 +397,54 @@ class Lexer:
                     self.advance()
                     self.advance()
                     # ==
-                    return {'token': 'EQUAL', 'tokenText': '=='}
+                    return Token(EQUAL, '==', start)
                 else:
                     self.advance()
-                    return {'token': 'ASSIGN', 'tokenText': '='}
+                    return Token(ASSIGN, '=', start)
             
             # <, <=
             if self.current_char == '<':
                 if self.peek() == '=':
                     self.advance()
                     self.advance()
-                    return {'token': 'LE', 'tokenText': '<='}
+                    return Token(LE, '<=', start)
                 else:
                     self.advance()
-                    return {'token': 'LT', 'tokenText': '<'}
+                    return Token(LT, '<', start)
             # >, >=
             if self.current_char == '>':
                 if self.peek() == '=':
                     self.advance()
                     self.advance()
-                    return {'token': 'GE', 'tokenText': '>='}
+                    return Token(GE, '>=', start)
                 else:
                     self.advance()
-                    return {'token': 'GT', 'tokenText': '>'}
+                    return Token(GT, '>', start)
             # !, != 
             if self.current_char == '!':
                 if self.peek() == '=':
                     self.advance()
                     self.advance()
-                    return {'token': 'NOTEQUAL', 'tokenText': '!='}
+                    return Token(NOTEQUAL, '!=', start)
                 else:
                     self.advance()
-                    return {'token': 'NOT', 'tokenText': '!'}
+                    return Token(NOT, '!', start)
             # +, -, *, /
             if self.current_char == '+':
                 self.advance()
-                return {'token': 'PLUS', 'tokenText': '+'}
+                return Token(PLUS, '+', start)
             if self.current_char == '-':
                 self.advance()
-                return {'token': 'MINUS', 'tokenText': '-'}
+                return Token(MINUS, '-', start)
             if self.current_char == '*':
                 self.advance()
-                return {'token': 'MULT', 'tokenText': '*'}
+                return Token(MULT, '*', start)
             # &&
             if self.current_char == '&':
                 if self.peek() == '&':
                     self.advance()
                     self.advance()
-                    return {'token': 'AND', 'tokenText': '&&'}
+                    return Token(AND, '&&', start)
                 else:
                     self.error("Invalid character: &")
             # ||
@@ -220,7 +452,7 @@ class Lexer:
                 if self.peek() == '|':
                     self.advance()
                     self.advance()
-                    return {'token': 'OR', 'tokenText': '||'}
+                    return Token(OR, '||', start)
                 else:
                     self.error("Invalid character: |")
              # identifiers or keywords.
@@ -238,28 +470,160 @@ class Lexer:
                 while self.current_char is not None and self.current_char.isdigit():
                     lexeme += self.current_char
                     self.advance()
-                return {'token': 'FCONST', 'tokenText': lexeme}
+                return Token(FCONST, lexeme, start)
             
 
             # if the character doesnt match any known token
             self.error(f"Unknown character: {self.current_char}")
 
         # EOF
-        return {'token': 'DD', 'tokenText': '$$'}
+        return Token(DD, '$$', self.pos)
+
+class MappedLexer(Lexer):
+    """
+    lexer over a bytes buffer, by default a read-only memory map of the file
+    the source is never decoded as a whole: ascii lexemes are matched on the
+    bytes directly and only the text around a non-ascii character is decoded
+    (utf-8) for the character-at-a-time scanner.
+    token positions are byte offsets into the buffer
+    """
+
+    def __init__(self, filename=None, data=None):
+        if data is None:
+            with open(filename, 'rb') as f:
+                if os.fstat(f.fileno()).st_size:
+                    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                else:
+                    # an empty file cannot be mapped
+                    data = b''
+        self.data = data
+        self.text = None
+        self.names = NameTable()
+        self.lines = LineIndex(data)
+        self.pos = 0
+        self.current_char = None
+
+    def getNextToken(self):
+        # same scan as Lexer.getNextToken, on bytes
+        data = self.data
+        pos = self.pos
+        while True:
+            m = BYTES_TOKEN_PATTERN.match(data, pos)
+            if m is None:
+                return self.scanWindow(pos)
+            kind = m.lastgroup
+            end = m.end()
+            if kind != 'COMMENT':
+                break
+            # skip past the closing */ (or to the end of an unterminated comment)
+            pos = data.find(b'*/', end)
+            pos = len(data) if pos < 0 else pos + 2
+        self.pos = end
+        if kind == 'ID':
+            lexeme = m.group('ID').decode('ascii')
+            kind = KEYWORD_KINDS.get(lexeme)
+            if kind is not None:
+                return Token(kind, lexeme, end - len(lexeme))
+            return self.nameToken(lexeme, end - len(lexeme))
+        if kind == 'OP':
+            token_type, lexeme = BYTES_OPERATORS[m.group('OP')]
+            return Token(token_type, lexeme, end - len(lexeme))
+        if kind == 'EOF':
+            return Token(DD, '$$', end)
+        if kind == 'DD':
+            return Token(DD, '$$', end - 2)
+        lexeme = m.group(kind).decode('ascii')
+        if kind == 'INUM':
+            return Token(ICONST, lexeme, end - len(lexeme))
+        if kind == 'FNUM':
+            return Token(FCONST, lexeme, end - len(lexeme))
+        # .5 => 0.5
+        return Token(FCONST, '0' + lexeme, end - len(lexeme))
 
+    # decode the text from pos up to the next ascii white space and let the
+    # character-at-a-time scanner take one token from it.
+    # no token contains ascii white space and utf-8 never puts those bytes
+    # inside a character, so the cut is always safe.  if the window held
+    # nothing but (unicode) white space or the start of a comment it is widened
+    def scanWindow(self, pos):
+        data = self.data
+        size = len(data)
+        stop = BYTES_WORD_PATTERN.match(data, pos).end()
+        while True:
+            window = data[pos:stop].decode('utf-8')
+            scanner = Lexer(text=window)
+            # report errors at their place in the buffer, not the window,
+            # and go on after the bad character
+            def error(message):
+                offset = pos + len(window[:scanner.pos].encode('utf-8'))
+                self.pos = offset + len(scanner.current_char.encode('utf-8'))
+                self.error(message, offset)
+            scanner.error = error
+            token = scanner.scanToken(0)
+            # ran off the end of the window without finding a token
+            if token.kind == DD and token.pos == len(window) and stop < size:
+                stop = BYTES_WORD_PATTERN.match(data, min(size, stop + 2 * (stop - pos))).end()
+                continue
+            break
+        self.pos = pos + len(window[:scanner.pos].encode('utf-8'))
+        start = pos + len(window[:token.pos].encode('utf-8'))
+        if token.kind == ID:
+            return self.nameToken(token.text, start)
+        token.pos = start
+        return token
+
+class LexerSession:
+    """
+    token source for one compilation
+    holds its own lexer (or a reader over a TokenBuffer), so any number of
+    sessions can be open at once - in threads, or one after another in a
+    long-lived process - without touching the module-level lexer
+    source is one of
+        filename : read (or memory-map, see initLexer) the file
+        text     : lex the given str
+        buffer   : walk an already built TokenBuffer
+    names is the NameTable behind the sym ids of the session's ID tokens,
+    lines the LineIndex that turns token offsets into line and column
+    """
+
+    def __init__(self, filename=None, text=None, buffer=None, mapped=None):
+        if buffer is not None:
+            self.source = buffer.reader()
+        elif text is not None:
+            self.source = Lexer(text=text)
+        else:
+            if mapped is None:
+                try:
+                    mapped = os.path.getsize(filename) >= MAPPED_LEXER_SIZE
+                except OSError:
+                    mapped = False
+            self.source = MappedLexer(filename) if mapped else Lexer(filename)
+        self.names = self.source.names
+        self.lines = self.source.lines
+        self.getNextToken = self.source.getNextToken
+        self.buffer = buffer
+
+# module-level session used by initLexer/getNextToken
 lexer = None
 
 # initLexer
 # accepts a string(filename) with the src code to analyze
 # opens file then create buffer(self.text) for the file to be compiled
+# mapped=True lexes from a memory map instead (MappedLexer), the default
+# picks that for files of MAPPED_LEXER_SIZE bytes or more
 # returns True(file open succeeded) or False(file open fail)
-def initLexer(filename):
+def initLexer(filename, mapped=None):
     global lexer
     try:
-        lexer = Lexer(filename)
+        lexer = LexerSession(filename, mapped=mapped)
         return True
     except IOError:
         return False
+
+# defaultSession
+# the session opened by the last initLexer call (None before that)
+def defaultSession():
+    return lexer
     
 # getNextToken
 # scan the text and return information for the next token
@@ -270,6 +634,207 @@ def getNextToken():
         raise Exception("Lexer not initialized. Call initLexer(filename) first.")
     return lexer.getNextToken()
 
+class TokenBuffer:
+    """
+    the whole token stream of one source, kept as parallel arrays
+    kinds  : array('B') token kind of each token
+    starts : array('I') source offset where each lexeme starts
+    ends   : array('I') source offset just past each lexeme
+    token text is only sliced out of the source when asked for,
+    the last token is always DD
+    names  : NameTable for the ID tokens handed out by token()
+    lines  : LineIndex of the text
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.names = NameTable()
+        self.lines = LineIndex(text)
+        self.kinds = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def tokenText(self, i):
+        # lexeme of token i, with the same spelling getNextToken gives it
+        kind = self.kinds[i]
+        text = KIND_TEXTS[kind]
+        if text is not None:
+            return text
+        lexeme = self.text[self.starts[i]:self.ends[i]]
+        # .5 => 0.5
+        if kind == FCONST and lexeme[0] == '.':
+            return '0' + lexeme
+        return lexeme
+
+    def token(self, i):
+        kind = self.kinds[i]
+        if kind == ID:
+            names = self.names
+            start = self.starts[i]
+            sym = names.sym(self.text[start:self.ends[i]])
+            return Token(ID, names.names[sym], start, sym)
+        return Token(kind, self.tokenText(i), self.starts[i])
+
+    def reader(self, start=0):
+        return TokenReader(self, start)
+
+class TokenReader:
+    """
+    cursor over a TokenBuffer with the same getNextToken interface as Lexer
+    several readers can walk one buffer, so later passes do not re-lex;
+    a reader may start at any token index (start)
+    no Token is made per token: getNextToken reads the buffer's arrays into
+    the reader's own kind, text, pos and sym and returns the reader itself, so
+    what it returns is only valid up to the next call.  text is sliced out
+    of the source for ID, ICONST and FCONST only
+    """
+
+    def __init__(self, buffer, start=0):
+        self.buffer = buffer
+        self.names = buffer.names
+        self.lines = buffer.lines
+        self.index = start
+        self.kind = None
+        self.text = None
+        self.pos = None
+        self.sym = -1
+
+    def getNextToken(self):
+        # keeps returning the final DD once the stream is used up
+        buffer = self.buffer
+        i = self.index
+        if i < len(buffer.kinds) - 1:
+            self.index = i + 1
+        kind = self.kind = buffer.kinds[i]
+        start = self.pos = buffer.starts[i]
+        text = KIND_TEXTS[kind]
+        sym = -1
+        if text is None:
+            if kind == ID:
+                names = self.names
+                sym = names.sym(buffer.text[start:buffer.ends[i]])
+                text = names.names[sym]
+            else:
+                text = buffer.tokenText(i)
+        self.text = text
+        self.sym = sym
+        return self
+
+# tokenize_all
+# scans the whole text in one pass and returns its TokenBuffer
+# the stream ends at the first DD ($$ or end of input), like the parser does
+def tokenize_all(text):
+    buf = TokenBuffer(text)
+    scanInto(buf, 0)
+    return buf
+
+# scanInto
+# scans buf.text from pos and appends the tokens to buf's arrays up to the
+# first DD; returns -1 then.
+# with limit/resync: for every token starting at or after limit,
+# resync(start) may return an index >= 0 to stop the scan there (relex)
+def scanInto(buf, pos, limit=None, resync=None):
+    text = buf.text
+    kinds = buf.kinds
+    starts = buf.starts
+    ends = buf.ends
+    size = len(text)
+    if limit is None:
+        limit = size + 1
+    scanner = None
+    match = TOKEN_PATTERN.scanner(text, pos).match
+    while True:
+        m = match()
+        if m is not None:
+            group = m.lastgroup
+            end = m.end()
+            if group == 'COMMENT':
+                # skip past the closing */ and restart the scan there
+                pos = text.find('*/', end)
+                pos = size if pos < 0 else pos + 2
+                match = TOKEN_PATTERN.scanner(text, pos).match
+                continue
+            if group == 'ID':
+                kind = KEYWORD_KINDS.get(m.group('ID'), ID)
+            elif group == 'OP':
+                kind = OPERATOR_KINDS[m.group('OP')]
+            elif group == 'EOF' or group == 'DD':
+                kind = DD
+            elif group == 'INUM':
+                kind = ICONST
+            else:
+                kind = FCONST
+            start = m.start(group)
+        else:
+            # the character-at-a-time scanner takes the next token
+            if scanner is None:
+                scanner = Lexer(text=text)
+            token = scanner.scanToken(pos)
+            kind = token.kind
+            start = token.pos
+            end = scanner.pos
+            match = TOKEN_PATTERN.scanner(text, end).match
+        if start >= limit:
+            index = resync(start)
+            if index >= 0:
+                return index
+        kinds.append(kind)
+        starts.append(start)
+        ends.append(end)
+        if kind == DD:
+            return -1
+        pos = end
+
+# relex
+# token stream of buf's text after an edit: deleted characters removed at
+# offset and inserted put in their place.  only the damaged part is lexed
+# again: scanning restarts at the end of the last token before the edit
+# (so a comment or white space run around it is rescanned as well, which
+# covers edits that open or close a /* */ comment) and stops at the first
+# new token past the edit that starts where an old token started - from
+# there on the text, and so the tokens, are the old ones moved by the
+# length change.  buf itself is left unchanged; the new buffer shares its
+# NameTable so sym ids stay the same across edits
+def relex(buf, offset, deleted, inserted):
+    old = buf.text
+    text = old[:offset] + inserted + old[offset + deleted:]
+    delta = len(inserted) - deleted
+    new = TokenBuffer(text)
+    new.names = buf.names
+    # first token that ends at or after the edit
+    first = bisect_left(buf.ends, offset)
+    if first >= len(buf):
+        # edit after the final DD ($$), the stream does not change
+        new.kinds = buf.kinds[:]
+        new.starts = buf.starts[:]
+        new.ends = buf.ends[:]
+        return new
+    new.kinds = buf.kinds[:first]
+    new.starts = buf.starts[:first]
+    new.ends = buf.ends[:first]
+    pos = buf.ends[first - 1] if first > 0 else 0
+    old_starts = buf.starts
+
+    def resync(start):
+        j = bisect_left(old_starts, start - delta, first)
+        if j < len(old_starts) and old_starts[j] == start - delta:
+            return j
+        return -1
+
+    j = scanInto(new, pos, offset + len(inserted), resync)
+    if j >= 0:
+        new.kinds.extend(buf.kinds[j:])
+        if delta:
+            new.starts.extend(map(delta.__add__, buf.starts[j:]))
+            new.ends.extend(map(delta.__add__, buf.ends[j:]))
+        else:
+            new.starts.extend(buf.starts[j:])
+            new.ends.extend(buf.ends[j:])
+    return new
+
 # main (for standalone testing)
 def main():
     # src file check
@@ -282,12 +847,21 @@ def main():
         print("Failed to open file:", filename)
         sys.exit(1)
 
-    # retrieve and print tokens until DD(EOf)
-    token = getNextToken()
-    while token['token'] != 'DD':
-        print("token: {} : |{}|".format(token['token'], token['tokenText']))
-        token = getNextToken()
+    # retrieve and print tokens until DD(EOf), errors in between
+    failed = False
+    while True:
+        try:
+            token = getNextToken()
+        except LexerError as e:
+            print(e)
+            failed = True
+            continue
+        if token.kind == DD:
+            break
+        print("token: {} : |{}|".format(TOKEN_NAMES[token.kind], token.text))
     print("token: DD : ||")
+    if failed:
+        sys.exit(1)
 
 if __name__ == '__main__':
     main()
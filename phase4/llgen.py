@@ -0,0 +1,279 @@
+# llgen.py
+# builds the LL(1) parse table (lltab.py) for llparser.TableParser from the
+# compiler's RASCL grammar (rascl.gmr)
+#
+#   python3 llgen.py [grammar file] [output module]
+#   python3 llgen.py --check [grammar file]
+#
+# steps: productions of the grammar file => FIRST and FOLLOW sets => LL(1)
+#        table, two productions for one (nonterminal, lookahead) cell are
+#        reported as a conflict
+# the terminals are the grammar file's TERMINALS (rascl.gmr's for a file
+# without them), as for the scanner (scangen.py).  --check runs the same
+# analysis on a grammar file (e.g. the phase3 one) and lists its conflicts
+# instead of generating anything
+import os
+import sys
+
+from scangen import HERE, GRAMMAR, read_terminals
+
+OUTPUT = os.path.join(HERE, 'lltab.py')
+
+USAGE = """Usage: python3 llgen.py [grammar file] [output module]
+       python3 llgen.py --check [grammar file]"""
+
+# productions of lhs => rhs lines, alternatives separated by |, e is the
+# empty string; returns [(lhs, [symbols])]
+def parse_rules(lines):
+    productions = []
+    for line in lines:
+        if '=>' not in line:
+            continue
+        lhs, rhs = line.split('=>', 1)
+        for alternative in rhs.split('|'):
+            productions.append((lhs.strip(), [s for s in alternative.split() if s != 'e']))
+    return productions
+
+# read the grammar file's productions: the rules after "Start symbol is ..."
+# returns (start symbol, productions)
+def read_productions(filename):
+    with open(filename, 'r') as f:
+        lines = f.read().splitlines()
+    for i, line in enumerate(lines):
+        if line.strip().startswith('Start symbol is'):
+            return line.split()[-1], parse_rules(lines[i + 1:])
+    raise ValueError(f"no start symbol in {filename}")
+
+def is_action(symbol):
+    return symbol.startswith('#')
+
+class Grammar:
+    """
+    productions over terminals, nonterminals and actions, with FIRST and
+    FOLLOW sets and the LL(1) table
+    symbols that are none of these (stray marks in the grammar file) are
+    dropped from their production and listed in unknown
+    """
+
+    def __init__(self, start, productions, terminals):
+        self.terminals = set(terminals)
+        nonterminals = []
+        for lhs, rhs in productions:
+            if lhs not in nonterminals:
+                nonterminals.append(lhs)
+        # the file says "program", the production is for "Program"
+        if start not in nonterminals:
+            start = next((n for n in nonterminals if n.lower() == start.lower()), start)
+        self.start = start
+        self.unknown = []
+        self.productions = []
+        for lhs, rhs in productions:
+            kept = []
+            for s in rhs:
+                if s in self.terminals or s in nonterminals or is_action(s):
+                    kept.append(s)
+                else:
+                    self.unknown.append((lhs, s))
+            self.productions.append((lhs, tuple(kept)))
+        self.prune()
+        self.compute_first()
+        self.compute_follow()
+        self.build_table()
+
+    # drop the nonterminals the start symbol cannot reach
+    def prune(self):
+        reachable = {self.start}
+        work = [self.start]
+        while work:
+            n = work.pop()
+            for lhs, rhs in self.productions:
+                if lhs == n:
+                    for s in rhs:
+                        if s not in self.terminals and not is_action(s) and s not in reachable:
+                            reachable.add(s)
+                            work.append(s)
+        self.productions = [(lhs, rhs) for lhs, rhs in self.productions if lhs in reachable]
+        self.nonterminals = []
+        for lhs, rhs in self.productions:
+            if lhs not in self.nonterminals:
+                self.nonterminals.append(lhs)
+        self.actions = sorted({s for lhs, rhs in self.productions for s in rhs if is_action(s)})
+        self.undefined = sorted(reachable - set(self.nonterminals))
+
+    # FIRST of a symbol string, and whether it can derive the empty string
+    def first_of(self, symbols):
+        result = set()
+        for s in symbols:
+            if is_action(s):
+                continue
+            if s in self.terminals:
+                result.add(s)
+                return result, False
+            result |= self.first.get(s, set())
+            if s not in self.nullable:
+                return result, False
+        return result, True
+
+    def compute_first(self):
+        self.first = {n: set() for n in self.nonterminals}
+        self.nullable = set()
+        changed = True
+        while changed:
+            changed = False
+            for lhs, rhs in self.productions:
+                first, nullable = self.first_of(rhs)
+                if not first <= self.first[lhs]:
+                    self.first[lhs] |= first
+                    changed = True
+                if nullable and lhs not in self.nullable:
+                    self.nullable.add(lhs)
+                    changed = True
+
+    def compute_follow(self):
+        self.follow = {n: set() for n in self.nonterminals}
+        changed = True
+        while changed:
+            changed = False
+            for lhs, rhs in self.productions:
+                for i, s in enumerate(rhs):
+                    if s not in self.follow:
+                        continue
+                    first, nullable = self.first_of(rhs[i + 1:])
+                    if nullable:
+                        first = first | self.follow[lhs]
+                    if not first <= self.follow[s]:
+                        self.follow[s] |= first
+                        changed = True
+
+    # table[nonterminal][terminal] = production index
+    # a production is predicted by FIRST of its right side, and by FOLLOW
+    # of its left side when the right side can be empty
+    def build_table(self):
+        self.table = {n: {} for n in self.nonterminals}
+        self.conflicts = []
+        for index, (lhs, rhs) in enumerate(self.productions):
+            first, nullable = self.first_of(rhs)
+            if nullable:
+                first = first | self.follow[lhs]
+            row = self.table[lhs]
+            for t in sorted(first):
+                if t in row and row[t] != index:
+                    self.conflicts.append((lhs, t, row[t], index))
+                else:
+                    row[t] = index
+
+    # production to predict when the lookahead is not in the table, or None
+    def default(self, n):
+        alternatives = [i for i, (lhs, rhs) in enumerate(self.productions) if lhs == n]
+        for i in alternatives:
+            if self.first_of(self.productions[i][1])[1]:
+                return i
+        return alternatives[0] if len(alternatives) == 1 else None
+
+    def production_text(self, index):
+        lhs, rhs = self.productions[index]
+        return f"{lhs} => {' '.join(rhs) or 'e'}"
+
+    def report(self):
+        lines = []
+        for lhs, s in self.unknown:
+            lines.append(f"unknown symbol {s} in a production for {lhs} (dropped)")
+        for n in self.undefined:
+            lines.append(f"no productions for {n}")
+        for lhs, t, a, b in self.conflicts:
+            lines.append(f"LL(1) conflict on {lhs}, {t}: "
+                         f"{self.production_text(a)} / {self.production_text(b)}")
+        return lines
+
+# Grammar of the productions in grammar_file, over its TERMINALS
+def load_grammar(grammar_file):
+    start, productions = read_productions(grammar_file)
+    terminals = read_terminals(grammar_file) or read_terminals(GRAMMAR)
+    return Grammar(start, productions, [name for name, text in terminals])
+
+def generate(grammar_file, output):
+    grammar = load_grammar(grammar_file)
+    if grammar.undefined or grammar.conflicts:
+        raise ValueError('\n'.join(grammar.report()))
+
+    out = []
+    out.append("# lltab.py")
+    out.append("# generated by llgen.py from the grammar productions - do not edit")
+    out.append("")
+    out.append(f"START = {grammar.start!r}")
+    out.append("")
+    out.append("NONTERMINALS = (")
+    for n in grammar.nonterminals:
+        out.append(f"    {n!r},")
+    out.append(")")
+    out.append("")
+    out.append("# semantic actions (TableParser.act_<name>)")
+    out.append("ACTIONS = (")
+    for a in grammar.actions:
+        out.append(f"    {a[1:]!r},")
+    out.append(")")
+    out.append("")
+    out.append("# (lhs, rhs), #name in rhs is an action")
+    out.append("PRODUCTIONS = (")
+    for index, (lhs, rhs) in enumerate(grammar.productions):
+        out.append(f"    ({lhs!r}, {rhs!r}),  # {index}")
+    out.append(")")
+    out.append("")
+    out.append("# per nonterminal: {lookahead terminal: production}")
+    out.append("TABLE = {")
+    for n in grammar.nonterminals:
+        out.append(f"    {n!r}: {grammar.table[n]!r},")
+    out.append("}")
+    out.append("")
+    out.append("# production taken on a lookahead the table has no entry for: the empty")
+    out.append("# production of a nullable nonterminal, the only production of one that")
+    out.append("# has a single production; the error then surfaces at the terminal where")
+    out.append("# the hand-written parser reports it")
+    out.append("DEFAULTS = {")
+    for n in grammar.nonterminals:
+        default = grammar.default(n)
+        if default is not None:
+            out.append(f"    {n!r}: {default},")
+    out.append("}")
+    out.append("")
+    with open(output, 'w') as f:
+        f.write('\n'.join(out))
+
+# FIRST/FOLLOW sets and conflicts of the grammar file
+def check(grammar_file):
+    grammar = load_grammar(grammar_file)
+    for n in grammar.nonterminals:
+        print(f"FIRST({n}) = {{{', '.join(sorted(grammar.first[n]))}}}"
+              + (" + e" if n in grammar.nullable else ""))
+        print(f"FOLLOW({n}) = {{{', '.join(sorted(grammar.follow[n]))}}}")
+    for line in grammar.report():
+        print(line)
+    return not grammar.conflicts
+
+def main():
+    args = sys.argv[1:]
+    checking = bool(args) and args[0] == '--check'
+    if checking:
+        args = args[1:]
+    if args and args[0] in ('-h', '--help'):
+        print(USAGE)
+        sys.exit(0)
+    if len(args) > (1 if checking else 2) or any(arg.startswith('-') for arg in args):
+        print(USAGE)
+        sys.exit(1)
+    grammar = args[0] if args else GRAMMAR
+    try:
+        if checking:
+            sys.exit(0 if check(grammar) else 1)
+        output = args[1] if len(args) > 1 else OUTPUT
+        generate(grammar, output)
+    except OSError as e:
+        print(f"Failed to open file: {e.filename}")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"{grammar}: {e}")
+        sys.exit(1)
+    print(f"Generated parse table in {output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+# llparser.py
+# table-driven LL(1) parser: the same language and IR as parser.Parser,
+# driven by the table llgen.py generates from the grammar (lltab.py)
+# kept apart from parser.py so the single-pass Parser does not build the
+# tables when it is imported
+import lltab
+from lexer import CompileError, TOKEN_NAMES, TOKEN_KINDS, LBRACKET
+from math import prod
+from stm import RETAIN_ALL, PARAMETER, FUNCTION as FUNCTION_SYMBOL
+from compiler import ExprAttr
+from parser import Parser, BINARY_OPERATORS
+
+# lltab symbols as ints for TableParser: terminals are their token kinds,
+# nonterminals and actions are numbered after them
+LL_NONTERMINAL = len(TOKEN_NAMES)
+LL_ACTION = LL_NONTERMINAL + len(lltab.NONTERMINALS)
+
+def ll_symbol(name):
+    if name[0] == '#':
+        return LL_ACTION + lltab.ACTIONS.index(name[1:])
+    if name in TOKEN_KINDS:
+        return TOKEN_KINDS[name]
+    return LL_NONTERMINAL + lltab.NONTERMINALS.index(name)
+
+LL_START = ll_symbol(lltab.START)
+# right sides reversed, ready to push
+LL_PUSH = tuple(tuple(ll_symbol(s) for s in reversed(rhs)) for lhs, rhs in lltab.PRODUCTIONS)
+# per nonterminal: production by token kind, -1 = syntax error
+LL_TABLE = tuple(tuple(lltab.TABLE[n].get(name, lltab.DEFAULTS.get(n, -1)) for name in TOKEN_NAMES)
+                 for n in lltab.NONTERMINALS)
+# errors for a nonterminal with no production for the lookahead, worded
+# like Parser's
+LL_MESSAGES = {
+    'ftypespec': "Expected VOID, INT, or FLOAT in ftypespec",
+    'typespec': "Expected INT or FLOAT in typespec",
+    'statement': "Expected statement",
+    'factor': "Expected factor",
+}
+LL_ERRORS = tuple(LL_MESSAGES.get(n, f"Expected {n}") for n in lltab.NONTERMINALS)
+
+class TableParser(Parser):
+    """
+    non-recursive LL(1) parser driven by the table llgen.py builds from
+    the grammar (lltab.py), accepts the same programs as Parser and emits
+    the same IR
+    one explicit stack holds the grammar symbols still to be matched,
+    values holds the semantic values (types, names, ExprAttrs, labels)
+    reaching #name in a production calls the hook act_name, whose
+    default emits the IR; override them to do something else
+    """
+
+    def __init__(self, lexer=None, functions=None, retention=RETAIN_ALL):
+        super().__init__(lexer, functions, retention)
+        # kind, text and source offset of the last matched token (a token
+        # is not kept itself, a TokenReader reuses it for the next one)
+        self.last_kind = None
+        self.last_text = None
+        self.last_pos = None
+        self.values = []
+        self.actions = tuple(getattr(self, 'act_' + name) for name in lltab.ACTIONS)
+
+    # stops at the first error (the symbol and value stacks are not
+    # resynchronized), which is recorded in self.errors like Parser's
+    def parse_Program(self):
+        table = LL_TABLE
+        push = LL_PUSH
+        actions = self.actions
+        stack = [LL_START]
+        try:
+            while stack:
+                symbol = stack.pop()
+                if symbol < LL_NONTERMINAL:
+                    if self.current.kind != symbol:
+                        self.error(f"Expected {TOKEN_NAMES[symbol]}")
+                    self.last_kind = symbol
+                    self.last_text = self.current.text
+                    self.last_pos = self.current.pos
+                    self.current = self.nextToken()
+                elif symbol < LL_ACTION:
+                    production = table[symbol - LL_NONTERMINAL][self.current.kind]
+                    if production < 0:
+                        self.error(LL_ERRORS[symbol - LL_NONTERMINAL])
+                    stack.extend(push[production])
+                else:
+                    actions[symbol - LL_ACTION]()
+        except CompileError as e:
+            self.report(e)
+        # the first error in the source is the one the parse stops at
+        self.resolve()
+        del self.errors[1:]
+
+    # program and functions
+
+    def act_program(self):
+        self.IR.emit_data_segment()
+        self.in_global = True
+
+    def act_globals_end(self):
+        self.in_global = False
+        self.IR.emit_text_segment()
+
+    def act_ftype(self):
+        self.values.append(TOKEN_NAMES[self.last_kind])
+
+    def act_function(self):
+        fname = self.last_text
+        ret_type = self.values.pop()
+        self.functions.add(fname, ret_type, pos=self.last_pos)
+        self.IR.emit('.label', 0, 0, fname)
+        self.symtab.enterScope(fname)
+        self.symtab.addSymbol(fname, ret_type, memory_location=fname, kind=FUNCTION_SYMBOL)
+
+    def act_function_end(self):
+        self.symtab.exitScope()
+        self.IR.emit('return', 0, 0, 0)
+
+    def act_main(self):
+        self.IR.emit('.label', 0, 0, 'main')
+        self.symtab.enterScope('main')
+
+    def act_main_end(self):
+        self.symtab.exitScope()
+        self.IR.emit('halt', 0, 0, 0)
+
+    def act_param(self):
+        # entered without a type, as by Parser.parse_fparm
+        name = self.last_text
+        dims = (None,) if self.current.kind == LBRACKET else ()
+        self.symtab.addSymbol(name, None, memory_location=name, dims=dims, kind=PARAMETER)
+
+    # declarations: type, then [name, bounds] per variable
+
+    def act_decl(self):
+        self.values.append(TOKEN_NAMES[self.current.kind])
+        self.values.append([])
+
+    def act_decl_var(self):
+        self.values.append(self.last_text)
+        self.values.append([])
+
+    def act_dim(self):
+        self.values[-1].append(int(self.last_text))
+
+    def act_decl_var_end(self):
+        dims = self.values.pop()
+        name = self.values.pop()
+        self.values[-1].append((name, prod(dims), tuple(dims)))
+
+    def act_decl_end(self):
+        vars = self.values.pop()
+        typ = self.values.pop()
+        directive = '.int' if typ=='INT' else '.float'
+        for name,count,dims in vars:
+            self.symtab.addSymbol(name, typ, memory_location=name, dims=dims)
+            self.IR.emit_data_directive(directive, count, name)
+            if self.in_global:
+                self.globals[name] = (typ, name)
+
+    # statements
+
+    def act_scope(self):
+        self.symtab.enterScope()
+
+    def act_scope_end(self):
+        self.symtab.exitScope()
+
+    def act_while(self):
+        cond = self.values.pop()
+        start=self.IR.new_label(); end=self.IR.new_label()
+        self.IR.emit('.label',0,0,start)
+        self.IR.emit('beq',cond.location,0,end)
+        self.values.append((start, end))
+
+    def act_while_end(self):
+        start, end = self.values.pop()
+        self.IR.emit('j',0,0,start)
+        self.IR.emit('.label',0,0,end)
+
+    def act_if(self):
+        cond = self.values.pop()
+        els=self.IR.new_label(); end=self.IR.new_label()
+        self.IR.emit('beq',cond.location,0,els)
+        self.values.append((els, end))
+
+    def act_else(self):
+        els, end = self.values[-1]
+        self.IR.emit('j',0,0,end)
+        self.IR.emit('.label',0,0,els)
+
+    def act_if_end(self):
+        els, end = self.values.pop()
+        self.IR.emit('.label',0,0,end)
+
+    def act_assign(self):
+        rhs = self.values.pop()
+        lhs = self.values.pop()
+        op='sw' if rhs.type=='INT' else 'fsw'
+        self.IR.emit(op,rhs.location,0,lhs.location)
+
+    def act_print(self):
+        expr = self.values.pop()
+        trap=2 if expr.type=='INT' else 4
+        self.IR.emit('syscall',trap,expr.location,0)
+
+    def act_read(self):
+        lhs = self.values.pop()
+        trap=1 if lhs.type=='INT' else 3
+        tmp=self.IR.new_temp() if lhs.type=='INT' else self.IR.new_ftemp()
+        self.IR.emit('syscall',trap,tmp,0)
+        self.IR.emit('sw' if lhs.type=='INT' else 'fsw',tmp,0,lhs.location)
+
+    def act_return(self):
+        expr = self.values.pop()
+        self.IR.emit('return',expr.location,0,0)
+
+    # calls: function name, then the list of argument ExprAttrs
+
+    def act_call(self):
+        self.values.append(self.last_text)
+        self.values.append([])
+
+    def act_arg(self):
+        arg = self.values.pop()
+        self.values[-1].append(arg)
+
+    def act_call_statement(self):
+        args = self.values.pop()
+        fname = self.values.pop()
+        for arg in args: self.IR.emit('param',arg.location,0,0)
+        self.IR.emit('call',fname,len(args),0)
+
+    def act_call_expression(self):
+        # ID ( in a factor: a call, to a function further on unless one is
+        # declared before
+        fname = self.last_text
+        if not self.functions.declared(fname, self.last_pos):
+            self.forward_call(fname)
+        self.act_call()
+
+    def act_call_end(self):
+        args = self.values.pop()
+        fname = self.values.pop()
+        for arg in args:
+            self.IR.emit('param', arg.location, 0, 0)
+        ret = self.IR.new_temp()
+        self.IR.emit('call', fname, len(args), ret)
+        self.values.append(ExprAttr('INT', ret))
+
+    # expressions
+
+    def act_factor_variable(self):
+        # a function declared before must be called
+        if self.functions.declared(self.last_text, self.last_pos):
+            self.error("Expected LPAREN")
+        self.act_variable()
+
+    def act_variable(self):
+        name = self.last_text
+        sym = self.symtab.lookup(name)
+        if sym is None:
+            self.error(f"Undeclared variable {name}")
+        self.values.append(sym)
+        self.values.append(None)
+
+    def act_index(self):
+        idx = self.values.pop()
+        self.values[-1] = idx
+
+    def act_load(self):
+        idx = self.values.pop()
+        sym = self.values.pop()
+        typ, mem_loc = sym.type, sym.memory_location
+        if idx is not None:
+            base = self.IR.new_temp()
+            self.IR.emit('la', mem_loc, 0, base)
+            off = self.IR.new_temp()
+            self.IR.emit('mul', idx.location, 4, off)
+            addr = self.IR.new_temp()
+            self.IR.emit('add', base, off, addr)
+        else:
+            addr = self.IR.new_temp()
+            self.IR.emit('la', mem_loc, 0, addr)
+        if typ == 'INT':
+            val = self.IR.new_temp()
+            self.IR.emit('lw', addr, 0, val)
+        else:
+            val = self.IR.new_ftemp()
+            self.IR.emit('flw', addr, 0, val)
+        self.values.append(ExprAttr(typ, val))
+
+    def act_iconst(self):
+        temp = self.IR.new_temp()
+        self.IR.emit('li', int(self.last_text), 0, temp)
+        self.values.append(ExprAttr('INT', temp))
+
+    def act_fconst(self):
+        temp = self.IR.new_ftemp()
+        self.IR.emit('fl', float(self.last_text), 0, temp)
+        self.values.append(ExprAttr('FLOAT', temp))
+
+    def act_negate(self):
+        expr = self.values.pop()
+        instr = 'sub' if expr.type == 'INT' else 'fsub'
+        dest = (self.IR.new_temp() if expr.type == 'INT'
+                else self.IR.new_ftemp())
+        self.IR.emit(instr, 0, expr.location, dest)
+        self.values.append(ExprAttr(expr.type, dest))
+
+    def act_op(self):
+        self.values.append(self.last_kind)
+
+    # operands and operator are on the stack, see BINARY_OPERATORS
+    def act_binary(self):
+        right = self.values.pop()
+        op = self.values.pop()
+        left = self.values.pop()
+        prec, right_assoc, instr, emit = BINARY_OPERATORS[op]
+        self.values.append(emit(self.IR, instr, left, right))
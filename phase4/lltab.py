@@ -0,0 +1,279 @@
+# lltab.py
+# generated by llgen.py from the grammar productions - do not edit
+
+START = 'Program'
+
+NONTERMINALS = (
+    'Program',
+    'funcdecls',
+    'funcdecl',
+    'maindecl',
+    'ftypespec',
+    'fdeclparms',
+    'fparmlist',
+    'fparm',
+    'parmVarTail',
+    'fparmlistrem',
+    'decllist',
+    'bstatementlist',
+    'statementlist',
+    'statementlisttail',
+    'decl',
+    'variablelist',
+    'variablelisttail',
+    'variable',
+    'variabletail',
+    'typespec',
+    'usevariable',
+    'usevariabletail',
+    'statement',
+    'assignmentstatement',
+    'otherexpression',
+    'otherexpressiontail',
+    'term',
+    'termtail',
+    'factortail',
+    'arglist',
+    'arglistrem',
+    'factor',
+    'whilestatement',
+    'ifstatement',
+    'istail',
+    'relationalexpr',
+    'printstatement',
+    'readstatement',
+    'returnstatement',
+    'callstatement',
+    'ifchain',
+    'returnvalue',
+    'reltail',
+    'booltail',
+)
+
+# semantic actions (TableParser.act_<name>)
+ACTIONS = (
+    'arg',
+    'assign',
+    'binary',
+    'call',
+    'call_end',
+    'call_expression',
+    'call_statement',
+    'decl',
+    'decl_end',
+    'decl_var',
+    'decl_var_end',
+    'dim',
+    'else',
+    'factor_variable',
+    'fconst',
+    'ftype',
+    'function',
+    'function_end',
+    'globals_end',
+    'iconst',
+    'if',
+    'if_end',
+    'index',
+    'load',
+    'main',
+    'main_end',
+    'negate',
+    'op',
+    'param',
+    'print',
+    'program',
+    'read',
+    'return',
+    'scope',
+    'scope_end',
+    'variable',
+    'while',
+    'while_end',
+)
+
+# (lhs, rhs), #name in rhs is an action
+PRODUCTIONS = (
+    ('Program', ('#program', 'decllist', '#globals_end', 'funcdecls', 'DD')),  # 0
+    ('funcdecls', ('funcdecl', 'funcdecls')),  # 1
+    ('funcdecls', ('maindecl',)),  # 2
+    ('funcdecls', ()),  # 3
+    ('funcdecl', ('FUNCTION', 'ftypespec', 'ID', '#function', 'fdeclparms', 'LBRACE', 'decllist', 'statementlist', 'RBRACE', '#function_end')),  # 4
+    ('maindecl', ('MAIN', 'LPAREN', 'RPAREN', '#main', 'LBRACE', 'decllist', 'statementlist', 'RBRACE', '#main_end')),  # 5
+    ('ftypespec', ('VOID', '#ftype')),  # 6
+    ('ftypespec', ('INT', '#ftype')),  # 7
+    ('ftypespec', ('FLOAT', '#ftype')),  # 8
+    ('fdeclparms', ('LPAREN', 'fparmlist', 'RPAREN')),  # 9
+    ('fparmlist', ('fparm', 'fparmlistrem')),  # 10
+    ('fparmlist', ()),  # 11
+    ('fparm', ('typespec', 'ID', '#param', 'parmVarTail')),  # 12
+    ('parmVarTail', ('LBRACKET', 'RBRACKET')),  # 13
+    ('parmVarTail', ()),  # 14
+    ('fparmlistrem', ('COMMA', 'fparm', 'fparmlistrem')),  # 15
+    ('fparmlistrem', ()),  # 16
+    ('decllist', ('decl', 'decllist')),  # 17
+    ('decllist', ()),  # 18
+    ('bstatementlist', ('LBRACE', '#scope', 'statementlist', '#scope_end', 'RBRACE')),  # 19
+    ('statementlist', ('statement', 'statementlisttail')),  # 20
+    ('statementlist', ()),  # 21
+    ('statementlisttail', ('SEMICOLON', 'statementlist')),  # 22
+    ('statementlisttail', ()),  # 23
+    ('decl', ('#decl', 'typespec', 'variablelist', 'SEMICOLON', '#decl_end')),  # 24
+    ('variablelist', ('variable', 'variablelisttail')),  # 25
+    ('variablelisttail', ('COMMA', 'variable', 'variablelisttail')),  # 26
+    ('variablelisttail', ()),  # 27
+    ('variable', ('ID', '#decl_var', 'variabletail', '#decl_var_end')),  # 28
+    ('variabletail', ('LBRACKET', 'ICONST', '#dim', 'RBRACKET', 'variabletail')),  # 29
+    ('variabletail', ()),  # 30
+    ('typespec', ('INT',)),  # 31
+    ('typespec', ('FLOAT',)),  # 32
+    ('usevariable', ('ID', '#variable', 'usevariabletail', '#load')),  # 33
+    ('usevariabletail', ('LBRACKET', 'otherexpression', 'RBRACKET', '#index')),  # 34
+    ('usevariabletail', ()),  # 35
+    ('statement', ('whilestatement',)),  # 36
+    ('statement', ('ifstatement',)),  # 37
+    ('statement', ('assignmentstatement',)),  # 38
+    ('statement', ('printstatement',)),  # 39
+    ('statement', ('readstatement',)),  # 40
+    ('statement', ('returnstatement',)),  # 41
+    ('statement', ('callstatement',)),  # 42
+    ('assignmentstatement', ('usevariable', 'ASSIGN', 'otherexpression', '#assign')),  # 43
+    ('otherexpression', ('term', 'otherexpressiontail')),  # 44
+    ('otherexpressiontail', ('PLUS', '#op', 'term', '#binary', 'otherexpressiontail')),  # 45
+    ('otherexpressiontail', ('MINUS', '#op', 'term', '#binary', 'otherexpressiontail')),  # 46
+    ('otherexpressiontail', ()),  # 47
+    ('term', ('factor', 'termtail')),  # 48
+    ('termtail', ('MULT', '#op', 'factor', '#binary', 'termtail')),  # 49
+    ('termtail', ('DIV', '#op', 'factor', '#binary', 'termtail')),  # 50
+    ('termtail', ()),  # 51
+    ('factortail', ('#call_expression', 'LPAREN', 'arglist', 'RPAREN', '#call_end')),  # 52
+    ('factortail', ('#factor_variable', 'usevariabletail', '#load')),  # 53
+    ('arglist', ('otherexpression', '#arg', 'arglistrem')),  # 54
+    ('arglist', ()),  # 55
+    ('arglistrem', ('COMMA', 'otherexpression', '#arg', 'arglistrem')),  # 56
+    ('arglistrem', ()),  # 57
+    ('factor', ('ID', 'factortail')),  # 58
+    ('factor', ('ICONST', '#iconst')),  # 59
+    ('factor', ('FCONST', '#fconst')),  # 60
+    ('factor', ('LPAREN', 'otherexpression', 'RPAREN')),  # 61
+    ('factor', ('MINUS', 'factor', '#negate')),  # 62
+    ('whilestatement', ('WHILE', 'LPAREN', 'relationalexpr', 'RPAREN', '#while', 'bstatementlist', '#while_end')),  # 63
+    ('ifstatement', ('IF', 'LPAREN', 'relationalexpr', 'RPAREN', 'ifchain', '#if', 'bstatementlist', '#else', 'istail', '#if_end')),  # 64
+    ('istail', ('ELSE', 'bstatementlist')),  # 65
+    ('istail', ()),  # 66
+    ('relationalexpr', ('otherexpression', 'reltail', 'booltail')),  # 67
+    ('printstatement', ('PRINT', 'otherexpression', '#print')),  # 68
+    ('readstatement', ('READ', 'usevariable', '#read')),  # 69
+    ('returnstatement', ('RETURN', 'returnvalue')),  # 70
+    ('callstatement', ('CALL', 'ID', '#call', 'LPAREN', 'arglist', 'RPAREN', '#call_statement')),  # 71
+    ('ifchain', ('OR', '#op', 'LPAREN', 'relationalexpr', 'RPAREN', '#binary', 'ifchain')),  # 72
+    ('ifchain', ('AND', '#op', 'LPAREN', 'relationalexpr', 'RPAREN', '#binary', 'ifchain')),  # 73
+    ('ifchain', ()),  # 74
+    ('returnvalue', ('otherexpression', '#return')),  # 75
+    ('returnvalue', ()),  # 76
+    ('reltail', ('LT', '#op', 'otherexpression', '#binary', 'reltail')),  # 77
+    ('reltail', ('LE', '#op', 'otherexpression', '#binary', 'reltail')),  # 78
+    ('reltail', ('GT', '#op', 'otherexpression', '#binary', 'reltail')),  # 79
+    ('reltail', ('GE', '#op', 'otherexpression', '#binary', 'reltail')),  # 80
+    ('reltail', ('EQUAL', '#op', 'otherexpression', '#binary', 'reltail')),  # 81
+    ('reltail', ('NOTEQUAL', '#op', 'otherexpression', '#binary', 'reltail')),  # 82
+    ('reltail', ()),  # 83
+    ('booltail', ('AND', '#op', 'relationalexpr', '#binary')),  # 84
+    ('booltail', ('OR', '#op', 'relationalexpr', '#binary')),  # 85
+    ('booltail', ()),  # 86
+)
+
+# per nonterminal: {lookahead terminal: production}
+TABLE = {
+    'Program': {'DD': 0, 'FLOAT': 0, 'FUNCTION': 0, 'INT': 0, 'MAIN': 0},
+    'funcdecls': {'FUNCTION': 1, 'MAIN': 2, 'DD': 3},
+    'funcdecl': {'FUNCTION': 4},
+    'maindecl': {'MAIN': 5},
+    'ftypespec': {'VOID': 6, 'INT': 7, 'FLOAT': 8},
+    'fdeclparms': {'LPAREN': 9},
+    'fparmlist': {'FLOAT': 10, 'INT': 10, 'RPAREN': 11},
+    'fparm': {'FLOAT': 12, 'INT': 12},
+    'parmVarTail': {'LBRACKET': 13, 'COMMA': 14, 'RPAREN': 14},
+    'fparmlistrem': {'COMMA': 15, 'RPAREN': 16},
+    'decllist': {'FLOAT': 17, 'INT': 17, 'CALL': 18, 'DD': 18, 'FUNCTION': 18, 'ID': 18, 'IF': 18, 'MAIN': 18, 'PRINT': 18, 'RBRACE': 18, 'READ': 18, 'RETURN': 18, 'WHILE': 18},
+    'bstatementlist': {'LBRACE': 19},
+    'statementlist': {'CALL': 20, 'ID': 20, 'IF': 20, 'PRINT': 20, 'READ': 20, 'RETURN': 20, 'WHILE': 20, 'RBRACE': 21},
+    'statementlisttail': {'SEMICOLON': 22, 'RBRACE': 23},
+    'decl': {'FLOAT': 24, 'INT': 24},
+    'variablelist': {'ID': 25},
+    'variablelisttail': {'COMMA': 26, 'SEMICOLON': 27},
+    'variable': {'ID': 28},
+    'variabletail': {'LBRACKET': 29, 'COMMA': 30, 'SEMICOLON': 30},
+    'typespec': {'INT': 31, 'FLOAT': 32},
+    'usevariable': {'ID': 33},
+    'usevariabletail': {'LBRACKET': 34, 'AND': 35, 'ASSIGN': 35, 'COMMA': 35, 'DIV': 35, 'EQUAL': 35, 'GE': 35, 'GT': 35, 'LE': 35, 'LT': 35, 'MINUS': 35, 'MULT': 35, 'NOTEQUAL': 35, 'OR': 35, 'PLUS': 35, 'RBRACE': 35, 'RBRACKET': 35, 'RPAREN': 35, 'SEMICOLON': 35},
+    'statement': {'WHILE': 36, 'IF': 37, 'ID': 38, 'PRINT': 39, 'READ': 40, 'RETURN': 41, 'CALL': 42},
+    'assignmentstatement': {'ID': 43},
+    'otherexpression': {'FCONST': 44, 'ICONST': 44, 'ID': 44, 'LPAREN': 44, 'MINUS': 44},
+    'otherexpressiontail': {'PLUS': 45, 'MINUS': 46, 'AND': 47, 'COMMA': 47, 'EQUAL': 47, 'GE': 47, 'GT': 47, 'LE': 47, 'LT': 47, 'NOTEQUAL': 47, 'OR': 47, 'RBRACE': 47, 'RBRACKET': 47, 'RPAREN': 47, 'SEMICOLON': 47},
+    'term': {'FCONST': 48, 'ICONST': 48, 'ID': 48, 'LPAREN': 48, 'MINUS': 48},
+    'termtail': {'MULT': 49, 'DIV': 50, 'AND': 51, 'COMMA': 51, 'EQUAL': 51, 'GE': 51, 'GT': 51, 'LE': 51, 'LT': 51, 'MINUS': 51, 'NOTEQUAL': 51, 'OR': 51, 'PLUS': 51, 'RBRACE': 51, 'RBRACKET': 51, 'RPAREN': 51, 'SEMICOLON': 51},
+    'factortail': {'LPAREN': 52, 'AND': 53, 'COMMA': 53, 'DIV': 53, 'EQUAL': 53, 'GE': 53, 'GT': 53, 'LBRACKET': 53, 'LE': 53, 'LT': 53, 'MINUS': 53, 'MULT': 53, 'NOTEQUAL': 53, 'OR': 53, 'PLUS': 53, 'RBRACE': 53, 'RBRACKET': 53, 'RPAREN': 53, 'SEMICOLON': 53},
+    'arglist': {'FCONST': 54, 'ICONST': 54, 'ID': 54, 'LPAREN': 54, 'MINUS': 54, 'RPAREN': 55},
+    'arglistrem': {'COMMA': 56, 'RPAREN': 57},
+    'factor': {'ID': 58, 'ICONST': 59, 'FCONST': 60, 'LPAREN': 61, 'MINUS': 62},
+    'whilestatement': {'WHILE': 63},
+    'ifstatement': {'IF': 64},
+    'istail': {'ELSE': 65, 'RBRACE': 66, 'SEMICOLON': 66},
+    'relationalexpr': {'FCONST': 67, 'ICONST': 67, 'ID': 67, 'LPAREN': 67, 'MINUS': 67},
+    'printstatement': {'PRINT': 68},
+    'readstatement': {'READ': 69},
+    'returnstatement': {'RETURN': 70},
+    'callstatement': {'CALL': 71},
+    'ifchain': {'OR': 72, 'AND': 73, 'LBRACE': 74},
+    'returnvalue': {'FCONST': 75, 'ICONST': 75, 'ID': 75, 'LPAREN': 75, 'MINUS': 75, 'RBRACE': 76, 'SEMICOLON': 76},
+    'reltail': {'LT': 77, 'LE': 78, 'GT': 79, 'GE': 80, 'EQUAL': 81, 'NOTEQUAL': 82, 'AND': 83, 'OR': 83, 'RPAREN': 83},
+    'booltail': {'AND': 84, 'OR': 85, 'RPAREN': 86},
+}
+
+# production taken on a lookahead the table has no entry for: the empty
+# production of a nullable nonterminal, the only production of one that
+# has a single production; the error then surfaces at the terminal where
+# the hand-written parser reports it
+DEFAULTS = {
+    'Program': 0,
+    'funcdecls': 3,
+    'funcdecl': 4,
+    'maindecl': 5,
+    'fdeclparms': 9,
+    'fparmlist': 11,
+    'fparm': 12,
+    'parmVarTail': 14,
+    'fparmlistrem': 16,
+    'decllist': 18,
+    'bstatementlist': 19,
+    'statementlist': 21,
+    'statementlisttail': 23,
+    'decl': 24,
+    'variablelist': 25,
+    'variablelisttail': 27,
+    'variable': 28,
+    'variabletail': 30,
+    'usevariable': 33,
+    'usevariabletail': 35,
+    'assignmentstatement': 43,
+    'otherexpression': 44,
+    'otherexpressiontail': 47,
+    'term': 48,
+    'termtail': 51,
+    'factortail': 53,
+    'arglist': 55,
+    'arglistrem': 57,
+    'whilestatement': 63,
+    'ifstatement': 64,
+    'istail': 66,
+    'relationalexpr': 67,
+    'printstatement': 68,
+    'readstatement': 69,
+    'returnstatement': 70,
+    'callstatement': 71,
+    'ifchain': 74,
+    'returnvalue': 76,
+    'reltail': 83,
+    'booltail': 86,
+}
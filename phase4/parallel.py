@@ -0,0 +1,224 @@
+# parallel.py
+# compiles the functions of a program in a pool of processes
+#
+# the token stream is lexed once and pre-scanned for its units: the global
+# declarations, then each FUNCTION ... { } and the MAIN ( ) { } found by
+# brace matching.  the parent parses the global declarations and skims the
+# function signatures (signatures.py), the workers each parse and lower
+# whole units in any order (with the globals and all the functions in
+# view), and the parent joins the results in source order.  workers number temporaries and
+# labels from 1 with a # mark, relocate() renames them past the ones of the
+# units before, so the IR is the Parser's, quad for quad.
+# anything the pre-scan does not recognise, and any program with errors,
+# is left to the Parser (which then reports all of them)
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from lexer import tokenize_all, LexerError, FUNCTION, MAIN, LBRACE, RBRACE
+from parser import Parser
+from stm import RETAIN_NONE
+from signatures import skim_buffer
+from compiler import IRCode
+
+# below this many tokens the pool costs more than it saves
+MIN_PARALLEL_TOKENS = 20000
+
+# token kinds the pre-scan looks at, as a byte class over the kinds array
+BOUNDARY = re.compile(b'[' + re.escape(bytes((FUNCTION, MAIN, LBRACE, RBRACE))) + b']')
+
+# read_tokens
+# token buffer of filename, or None if it does not lex (the Parser reports
+# the first error then, which may be a parse error before the lexer's)
+def read_tokens(filename):
+    with open(filename, 'r') as f:
+        text = f.read()
+    try:
+        return tokenize_all(text)
+    except LexerError:
+        return None
+
+# prescan
+# (start, end) token index ranges of the units of buffer, the globals are
+# the tokens before the first one; None unless the program is a run of
+# functions with balanced braces, optionally ended by main, then DD
+def prescan(buffer):
+    kinds = buffer.kinds.tobytes()
+    units = []
+    depth = 0
+    start = -1
+    for m in BOUNDARY.finditer(kinds):
+        i = m.start()
+        kind = kinds[i]
+        if kind == LBRACE:
+            if start < 0:
+                return None
+            depth += 1
+        elif kind == RBRACE:
+            depth -= 1
+            if depth < 0:
+                return None
+            if depth == 0:
+                units.append((start, i + 1))
+                start = -1
+        else:
+            # a unit starts right where the one before ended, main is last
+            if depth or start >= 0:
+                return None
+            if units and (units[-1][1] != i or kinds[units[-1][0]] == MAIN):
+                return None
+            start = i
+    if not units or depth or start >= 0 or units[-1][1] != len(kinds) - 1:
+        return None
+    return units
+
+class UnitIR(IRCode):
+    """
+    IRCode of one unit compiled on its own
+    temporaries and labels are numbered from 1 with a # mark ('#T1', '#F1',
+    '#L1'), which no identifier or constant has
+    """
+
+    def new_temp(self):
+        self.temp_count += 1
+        return f"#T{self.temp_count}"
+
+    def new_ftemp(self):
+        self.ftemp_count += 1
+        return f"#F{self.ftemp_count}"
+
+    def new_label(self):
+        self.label_count += 1
+        return f"#L{self.label_count}"
+
+# relocate
+# quads of a UnitIR (using unit_temps, unit_ftemps, unit_labels marked
+# names) renamed, numbered after the temps, ftemps and labels already used
+def relocate(quads, unit_temps, unit_ftemps, unit_labels, temps, ftemps, labels):
+    names = {f"#T{n}": f"T{n + temps}" for n in range(1, unit_temps + 1)}
+    names.update({f"#F{n}": f"FT{n + ftemps}" for n in range(1, unit_ftemps + 1)})
+    names.update({f"#L{n}": f"L{n + labels}" for n in range(1, unit_labels + 1)})
+    get = names.get
+    return [(op, get(a, a), get(b, b), get(c, c)) for op, a, b, c in quads]
+
+# state of a worker process, set once by init_worker
+worker = None
+
+def init_worker(buffer, symbols, globals, functions):
+    global worker
+    worker = (buffer, symbols, globals, functions)
+
+# compile_unit
+# runs in a worker: parses the unit of tokens start..end-1 into a UnitIR
+# returns (data_quads, quads, temps, ftemps, labels), or None if the unit
+# has errors (or has to be left to the sequential Parser otherwise)
+def compile_unit(task):
+    start, end = task
+    buffer, symbols, globals, functions = worker
+    reader = buffer.reader(start)
+    try:
+        # the unit's scopes are not needed once it is parsed
+        parser = Parser(reader, functions, RETAIN_NONE)
+        parser.IR = parser.target = IR = UnitIR()
+        for name, typ, location, dims in symbols:
+            parser.symtab.addSymbol(name, typ, memory_location=location, dims=dims)
+        parser.globals = globals
+        if parser.peek() == FUNCTION:
+            parser.parse_funcdecl()
+        else:
+            parser.parse_maindecl()
+    except Exception:
+        return None
+    # the current token has to be the one after the unit, and the calls
+    # to functions further on have to be to functions of the program
+    if parser.errors or reader.index != min(end + 1, len(buffer) - 1):
+        return None
+    if any(name not in functions for name, error in parser.forward):
+        return None
+    return (IR.data_quads, IR.quads, IR.temp_count, IR.ftemp_count, IR.label_count)
+
+class SplitProgram:
+    """
+    a program cut into its units, with its global declarations parsed
+    units     : (start, end) token index ranges of the functions and main
+    IR        : the IRCode so far (data segment with the globals, text
+                segment header)
+    symbols   : the global symbols, (name, type, memory location, dims)
+    globals   : Parser.globals after the global declarations
+    functions : FunctionIndex of the program
+    """
+
+    def __init__(self, buffer, units, IR, symbols, globals, functions):
+        self.buffer = buffer
+        self.units = units
+        self.IR = IR
+        self.symbols = symbols
+        self.globals = globals
+        self.functions = functions
+
+# split_program
+# SplitProgram of the program in buffer, None unless it has at least two
+# units and its global declarations parse without errors
+def split_program(buffer):
+    units = prescan(buffer)
+    if units is None or len(units) < 2:
+        return None
+
+    # global declarations, as Parser.parse_Program starts
+    functions = skim_buffer(buffer)
+    reader = buffer.reader()
+    parser = Parser(reader, functions)
+    IR = parser.IR
+    IR.emit_data_segment()
+    parser.in_global = True
+    parser.parse_decllist()
+    parser.in_global = False
+    IR.emit_text_segment()
+    if parser.errors or reader.index - 1 != units[0][0]:
+        return None
+
+    symbols = [(sym.identifier, sym.type, sym.memory_location, sym.dims)
+               for sym in parser.symtab.symbol_table[0].values()]
+    return SplitProgram(buffer, units, IR, symbols, parser.globals, functions)
+
+# compile_units
+# compile_unit results for units ks of program, in jobs processes (in this
+# one for jobs < 2)
+def compile_units(program, ks, jobs):
+    tasks = [program.units[k] for k in ks]
+    state = (program.buffer, program.symbols, program.globals, program.functions)
+    if jobs < 2 or len(tasks) < 2:
+        init_worker(*state)
+        return [compile_unit(task) for task in tasks]
+    pool = ProcessPoolExecutor(jobs, initializer=init_worker, initargs=state)
+    try:
+        return list(pool.map(compile_unit, tasks, chunksize=max(1, len(tasks) // (jobs * 4))))
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+# join
+# program.IR with the compiled units appended in order, temporaries and
+# labels renumbered; None if a unit could not be compiled
+def join(program, results):
+    IR = program.IR
+    for result in results:
+        if result is None:
+            return None
+        data_quads, quads, temps, ftemps, labels = result
+        IR.data_quads.extend(data_quads)
+        IR.quads.extend(relocate(quads, temps, ftemps, labels,
+                                 IR.temp_count, IR.ftemp_count, IR.label_count))
+        IR.temp_count += temps
+        IR.ftemp_count += ftemps
+        IR.label_count += labels
+    return IR
+
+# compile_parallel
+# IRCode of the program in buffer, compiled with jobs processes; None if
+# it is not worth it or the program has to go through the Parser
+def compile_parallel(buffer, jobs, min_tokens=MIN_PARALLEL_TOKENS):
+    if jobs < 2 or len(buffer) < min_tokens:
+        return None
+    program = split_program(buffer)
+    if program is None:
+        return None
+    return join(program, compile_units(program, range(len(program.units)), jobs))
@@ -0,0 +1,146 @@
+# parseprof.py
+# per-production profile of the recursive descent parsers
+#
+# profiled(Parser) is a subclass of the parser whose parse_* methods are
+# wrapped to record, for every production and every RASCL function:
+#   calls  : how often it was parsed
+#   tokens : tokens consumed
+#   time   : cumulative time (a production inside itself counts once) and,
+#            for productions, self time (without the productions it called)
+# the parser classes themselves are not touched, so a compile that is not
+# profiled runs exactly the code it always did
+#
+# the profile is written as JSON, or as folded stacks (one line per call
+# path with its self time in ns, for flamegraph.pl, speedscope, ...):
+#   Program;funcdecls;funcdecl:fact;statementlist;statement 18231
+import json
+from time import perf_counter_ns
+
+from lexer import ID
+
+class Profile:
+    """
+    productions : production => [calls, tokens, total ns, self ns]
+    functions   : RASCL function (main for main) => [calls, tokens, total ns]
+    stacks      : folded call path => self ns
+    """
+
+    def __init__(self):
+        self.productions = {}
+        self.functions = {}
+        self.stacks = {}
+        self.tokens = 0     # tokens read so far
+        self.frames = []    # [production, label, child ns] of the open calls
+        self.active = {}    # production => open calls of it
+
+    # parse production with method(parser, *args), recording it
+    def call(self, production, method, parser, args):
+        frames = self.frames
+        active = self.active
+        frame = [production, production, 0]
+        frames.append(frame)
+        depth = active.get(production, 0)
+        active[production] = depth + 1
+        tokens = self.tokens
+        start = perf_counter_ns()
+        try:
+            result = method(parser, *args)
+            # the function's name follows its return type
+            if production == 'ftypespec' and len(frames) > 1 and parser.current.kind == ID:
+                frames[-2][1] = 'funcdecl:' + parser.current.text
+            return result
+        finally:
+            elapsed = perf_counter_ns() - start
+            used = self.tokens - tokens
+            path = ';'.join([f[1] for f in frames])
+            frames.pop()
+            active[production] = depth
+            if frames:
+                frames[-1][2] += elapsed
+            self_ns = elapsed - frame[2]
+
+            stats = self.productions.get(production)
+            if stats is None:
+                stats = self.productions[production] = [0, 0, 0, 0]
+            stats[0] += 1
+            stats[3] += self_ns
+            if not depth:
+                stats[1] += used
+                stats[2] += elapsed
+            self.stacks[path] = self.stacks.get(path, 0) + self_ns
+
+            if production == 'funcdecl' or production == 'maindecl':
+                name = 'main' if production == 'maindecl' else frame[1].partition(':')[2]
+                stats = self.functions.get(name)
+                if stats is None:
+                    stats = self.functions[name] = [0, 0, 0]
+                stats[0] += 1
+                stats[1] += used
+                stats[2] += elapsed
+
+    # the profile as a dict (what write_json writes), costliest first
+    def report(self):
+        return {
+            'unit': 'ns',
+            'tokens': self.tokens,
+            'productions': {name: {'calls': calls, 'tokens': tokens,
+                                   'total': total, 'self': self_ns}
+                            for name, (calls, tokens, total, self_ns)
+                            in sorted(self.productions.items(), key=lambda item: -item[1][2])},
+            'functions': {name: {'calls': calls, 'tokens': tokens, 'total': total}
+                          for name, (calls, tokens, total)
+                          in sorted(self.functions.items(), key=lambda item: -item[1][2])},
+        }
+
+    def write_json(self, f):
+        json.dump(self.report(), f, indent=1)
+        f.write('\n')
+
+    def write_folded(self, f):
+        for path, self_ns in self.stacks.items():
+            f.write(f"{path} {self_ns}\n")
+
+    # .json gets JSON, anything else folded stacks
+    def write(self, filename):
+        with open(filename, 'w') as f:
+            if filename.endswith('.json'):
+                self.write_json(f)
+            else:
+                self.write_folded(f)
+
+# the method for production name, recording into the parser's profile
+def hook(production, method):
+    def profiled(self, *args):
+        return self.profile.call(production, method, self, args)
+    profiled.__name__ = method.__name__
+    profiled.__doc__ = method.__doc__
+    return profiled
+
+profiled_classes = {}
+
+# profiled
+# subclass of parser_class that records a Profile (in self.profile) of
+# each parse
+def profiled(parser_class):
+    cls = profiled_classes.get(parser_class)
+    if cls is not None:
+        return cls
+
+    def __init__(self, *args, **kwargs):
+        profile = self.profile = Profile()
+        parser_class.__init__(self, *args, **kwargs)
+        next_token = self.nextToken
+
+        def nextToken():
+            profile.tokens += 1
+            return next_token()
+        self.nextToken = nextToken
+
+    namespace = {'__init__': __init__, '__doc__': parser_class.__doc__}
+    for name in dir(parser_class):
+        method = getattr(parser_class, name)
+        if name.startswith('parse_') and callable(method):
+            namespace[name] = hook(name[len('parse_'):], method)
+    cls = profiled_classes[parser_class] = type('Profiled' + parser_class.__name__,
+                                                (parser_class,), namespace)
+    return cls
@@ -1,29 +1,152 @@
-import sys
-from lexer import getNextToken
-from stm import SymbolTableManager
+from lexer import (defaultSession, CompileError, LexerError, TOKEN_NAMES,
+                   DD, ID, ICONST, FCONST, IF, ELSE, WHILE, INT, FLOAT, VOID,
+                   CALL, PRINT, READ, FUNCTION, MAIN, RETURN, SEMICOLON,
+                   LPAREN, RPAREN, COMMA, LBRACE, RBRACE, LBRACKET, RBRACKET,
+                   ASSIGN, EQUAL, LT, LE, GT, GE, NOTEQUAL, PLUS, MINUS, MULT,
+                   DIV, AND, OR)
+from stm import SymbolTableManager, RETAIN_ALL, PARAMETER, FUNCTION as FUNCTION_SYMBOL
+from signatures import FunctionIndex
 from compiler import IRCode, ExprAttr
 
+class ParseError(CompileError):
+    """
+    syntax (or name) error; found is the kind of the token the parser got
+    """
+
+    def __init__(self, message, pos, line, column, found):
+        super().__init__(message, pos, line, column)
+        self.found = found
+
+    def __str__(self):
+        return (f"Parse error: {self.message}, got {TOKEN_NAMES[self.found]} "
+                f"at line {self.line}, column {self.column}")
+
+# tokens that cannot be inside a function: where one of them is found
+# while skipping after an error, the function being parsed has ended
+FUNCTION_END = (FUNCTION, MAIN, DD)
+# tokens a statement starts with
+STATEMENT_KINDS = (WHILE, IF, ID, PRINT, READ, RETURN, CALL)
+
 class Parser:
-    def __init__(self):
-        self.current = getNextToken()
-        self.symtab  = SymbolTableManager()
+    """
+    recursive descent parser emitting the IR as it goes
+    errors do not stop the parse: each one (a LexerError or ParseError) is
+    recorded in self.errors, the parser skips ahead to where it can go on
+    (panic mode, see recover) and parse_Program returns normally; the IR
+    is only meaningful when self.errors is empty
+    """
+
+    def __init__(self, lexer=None, functions=None, retention=RETAIN_ALL):
+        # token source: a LexerSession (getNextToken, and lines for error
+        # locations), defaults to the session set up by initLexer
+        # functions: FunctionIndex the functions are added to as they are
+        # declared, or one of the whole program (signatures.skim_buffer)
+        # for a function parsed on its own; a name is a function only
+        # where it is declared before (see forward_call)
+        # retention: which exited scopes the symbol table keeps (see
+        # SymbolTableManager); the parser never looks at one again
+        if lexer is None:
+            lexer = defaultSession()
+            if lexer is None:
+                raise Exception("Lexer not initialized. Call initLexer(filename) first.")
+        self.lexer = lexer
+        self.errors = []
+        self.nextToken = lexer.getNextToken
+        self.current = self.advance()
+        self.symtab  = SymbolTableManager(retention)
         self.IR      = IRCode()
         self.globals    = {}      
         self.in_global  = False  
-        self.functions = set()
+        self.functions = FunctionIndex() if functions is None else functions
+        # calls to names not declared as functions so far, (name, error)
+        # each, checked by resolve
+        self.forward = []
+        # expressions: operator table, and what folded operators are
+        # emitted into (the IRCode; TreeParser builds tree nodes instead)
+        self.operators = BINARY_OPERATORS
+        self.target = self.IR
 
     def error(self, msg):
-        print(f"Parse error: {msg}, got {self.current['token']}")
-        sys.exit(1)
+        line, column = self.lexer.lines.position(self.current.pos)
+        raise ParseError(msg, self.current.pos, line, column, self.current.kind)
+
+    # ID ( for a name not declared as a function so far: a call to one
+    # declared further on, checked when the parse ends (the error is the
+    # one for an undeclared name at the call)
+    def forward_call(self, name):
+        if self.symtab.lookup(name) is None:
+            msg = f"Undeclared variable {name}"
+        else:
+            msg = f"Undeclared function {name}"
+        line, column = self.lexer.lines.position(self.current.pos)
+        error = ParseError(msg, self.current.pos, line, column, self.current.kind)
+        self.forward.append((name, error))
+
+    # report the forward calls to names the program never declared as
+    # functions; errors stay in source order
+    def resolve(self):
+        if self.forward:
+            for name, error in self.forward:
+                if name not in self.functions:
+                    self.report(error)
+            self.forward = []
+            self.errors.sort(key=lambda e: e.pos)
+
+    # record an error (once, it may be raised again while unwinding)
+    def report(self, error):
+        if error not in self.errors:
+            self.errors.append(error)
+
+    # next token; lexer errors (error, and any raised on the way) are
+    # recorded, the lexer goes on after the bad character
+    def advance(self, error=None):
+        while True:
+            if error is not None:
+                self.report(error)
+            try:
+                return self.nextToken()
+            except LexerError as e:
+                error = e
+
+    # skip tokens up to one of kinds
+    def skip(self, kinds):
+        while self.current.kind not in kinds:
+            self.current = self.advance()
+
+    # panic mode: record e and skip to the next SEMICOLON, RBRACE,
+    # FUNCTION, MAIN or DD, returns its kind.  blocks { } on the way are
+    # skipped whole, so the SEMICOLON or RBRACE is one of the list being
+    # parsed: declaration and statement lists go on after a SEMICOLON and
+    # end at a RBRACE.  FUNCTION, MAIN and DD end the function being
+    # parsed, so there e is raised again, up to parse_funcdecls (in the
+    # global declarations they just end them)
+    def recover(self, e):
+        self.report(e)
+        depth = 0
+        while True:
+            kind = self.current.kind
+            if kind in FUNCTION_END or (depth == 0 and kind in (SEMICOLON, RBRACE)):
+                break
+            if kind == LBRACE:
+                depth += 1
+            elif kind == RBRACE:
+                depth -= 1
+            self.current = self.advance()
+        if kind in FUNCTION_END and not self.in_global:
+            raise e
+        return kind
 
     def peek(self):
-        return self.current['token']
+        return self.current.kind
 
     def match(self, token_type):
-        if self.current['token'] == token_type:
-            self.current = getNextToken()
+        if self.current.kind == token_type:
+            try:
+                self.current = self.nextToken()
+            except LexerError as e:
+                self.current = self.advance(e)
         else:
-            self.error(f"Expected {token_type}")
+            self.error(f"Expected {TOKEN_NAMES[token_type]}")
 
     # Program => decllist funcdecls DD
     def parse_Program(self):
@@ -35,33 +158,47 @@ class Parser:
 
         self.IR.emit_text_segment()
         self.parse_funcdecls()
-        self.match("DD")
+        try:
+            self.match(DD)
+        except ParseError as e:
+            self.report(e)
+        self.resolve()
 
     # funcdecls => funcdecl funcdecls | maindecl
+    # the list productions here are parsed as loops, so long programs
+    # do not grow the Python stack
+    # after an error in a function the rest of it is skipped
     def parse_funcdecls(self):
-        if self.peek() == "FUNCTION":
-            self.parse_funcdecl()
-            self.parse_funcdecls()
-        elif self.peek() == "MAIN":
-            self.parse_maindecl()
+        while True:
+            try:
+                while self.peek() == FUNCTION:
+                    self.parse_funcdecl()
+                if self.peek() == MAIN:
+                    self.parse_maindecl()
+                return
+            except ParseError as e:
+                self.report(e)
+                while self.symtab.current_scope != 0:
+                    self.symtab.exitScope()
+                self.skip(FUNCTION_END)
 
     # funcdecl => FUNCTION ftypespec simplevar fdeclparms LBRACE decllist statementlist RBRACE
     def parse_funcdecl(self):
-        self.match("FUNCTION")
+        self.match(FUNCTION)
         ret_type = self.parse_ftypespec()
-        fname = self.current['tokenText']
-        self.functions.add(fname)
-        self.match("ID")
+        fname = self.current.text
+        self.functions.add(fname, ret_type, pos=self.current.pos)
+        self.match(ID)
         self.IR.emit('.label', 0, 0, fname)
 
         # enter function scope 
-        self.symtab.enterScope()
-        self.symtab.addSymbol(fname, ret_type, memory_location=fname)
+        self.symtab.enterScope(fname)
+        self.symtab.addSymbol(fname, ret_type, memory_location=fname, kind=FUNCTION_SYMBOL)
         self.parse_fdeclparms()
-        self.match("LBRACE")
+        self.match(LBRACE)
         self.parse_decllist()
         self.parse_statementlist()
-        self.match("RBRACE")
+        self.match(RBRACE)
 
         # exit function scope
         self.symtab.exitScope()
@@ -69,17 +206,17 @@ class Parser:
 
     # maindecl => MAIN LPAREN RPAREN LBRACE decllist statementlist RBRACE
     def parse_maindecl(self):
-        self.match("MAIN")
-        self.match("LPAREN")
-        self.match("RPAREN")
+        self.match(MAIN)
+        self.match(LPAREN)
+        self.match(RPAREN)
         self.IR.emit('.label', 0, 0, 'main')
         # enter main scope
-        self.symtab.enterScope()
+        self.symtab.enterScope('main')
 
-        self.match("LBRACE")
+        self.match(LBRACE)
         self.parse_decllist()
         self.parse_statementlist()
-        self.match("RBRACE")
+        self.match(RBRACE)
 
         # exit main scope
         self.symtab.exitScope()
@@ -87,66 +224,73 @@ class Parser:
 
     # ftypespec => VOID | INT | FLOAT
     def parse_ftypespec(self):
-        if self.peek() in ("VOID", "INT", "FLOAT"):
+        if self.peek() in (VOID, INT, FLOAT):
             typ = self.peek()
             self.match(typ)
-            return typ
+            return TOKEN_NAMES[typ]
         self.error("Expected VOID, INT, or FLOAT in ftypespec")
 
     # fdeclparms => LPAREN fparmlist RPAREN
     def parse_fdeclparms(self):
-        self.match("LPAREN")
+        self.match(LPAREN)
         self.parse_fparmlist()
-        self.match("RPAREN")
+        self.match(RPAREN)
 
     # fparmlist => fparm fparmlistrem | eps
     def parse_fparmlist(self):
-        if self.peek() in ("INT", "FLOAT"):
+        if self.peek() in (INT, FLOAT):
             self.parse_fparm()
             self.parse_fparmlistrem()
 
     # fparmlistrem => COMMA fparm fparmlistrem | eps
     def parse_fparmlistrem(self):
-        if self.peek() == "COMMA":
-            self.match("COMMA")
+        while self.peek() == COMMA:
+            self.match(COMMA)
             self.parse_fparm()
-            self.parse_fparmlistrem()
 
     # fparm => typespec parmVar
     def parse_fparm(self):
         typ = self.parse_typespec()
-        name = self.current['tokenText']
-        self.match("ID")
-        if self.peek() == "LBRACKET":
-            self.match("LBRACKET"); self.match("RBRACKET")
-        self.symtab.addSymbol(name, typ, memory_location=name)
+        name = self.current.text
+        self.match(ID)
+        dims = ()
+        if self.peek() == LBRACKET:
+            self.match(LBRACKET); self.match(RBRACKET)
+            dims = (None,)
+        self.symtab.addSymbol(name, typ, memory_location=name, dims=dims, kind=PARAMETER)
 
     # parmVar => ID parmVarTail
     def parse_parmVar(self):
-        self.match("ID")
+        self.match(ID)
         self.parse_parmVarTail()
 
     # parmVarTail => LBRACKET RBRACKET parmVarTail | eps
     def parse_parmVarTail(self):
-        if self.peek() == "LBRACKET":
-            self.match("LBRACKET"); self.match("RBRACKET")
+        if self.peek() == LBRACKET:
+            self.match(LBRACKET); self.match(RBRACKET)
             self.parse_parmVarTail()
 
     # decllist => decl decllist | eps
     def parse_decllist(self):
-        if self.peek() in ("INT", "FLOAT"):
-            self.parse_decl()
-            self.parse_decllist()
+        while True:
+            try:
+                while self.peek() in (INT, FLOAT):
+                    self.parse_decl()
+                return
+            except ParseError as e:
+                if self.recover(e) != SEMICOLON:
+                    return
+                self.match(SEMICOLON)
 
     # decl => typespec variablelist SEMICOLON
     def parse_decl(self):
-        typ = self.current['token']
+        typ = TOKEN_NAMES[self.current.kind]
         self.parse_typespec()
         vars = self.parse_variablelist()
-        self.match("SEMICOLON")
+        self.match(SEMICOLON)
         directive = '.int' if typ=='INT' else '.float'
-        for name,count in vars:
-            self.symtab.addSymbol(name, typ, memory_location=name)
+        for name,count,dims in vars:
+            self.symtab.addSymbol(name, typ, memory_location=name, dims=dims)
             self.IR.emit_data_directive(directive, count, name)
             if self.in_global:
                 self.globals[name] = (typ, name)
@@ -154,86 +298,98 @@ class Parser:
     # variablelist => variable variablelisttail
     def parse_variablelist(self):
         lst = []
-        name,count = self.parse_variable()
-        lst.append((name,count))
+        lst.append(self.parse_variable())
         lst.extend(self.parse_variablelisttail())
         return lst
 
     # variablelisttail => COMMA variable variablelisttail | eps
     def parse_variablelisttail(self):
-        if self.peek() == "COMMA":
-            self.match("COMMA")
-            name,count = self.parse_variable()
-            return [(name,count)] + self.parse_variablelisttail()
-        return []
+        lst = []
+        while self.peek() == COMMA:
+            self.match(COMMA)
+            lst.append(self.parse_variable())
+        return lst
 
     # variable => ID variabletail
+    # returns name, element count and the array bounds (() for a scalar)
     def parse_variable(self):
-        name = self.current['tokenText']
-        self.match("ID")
+        name = self.current.text
+        self.match(ID)
         # for each “[N]” multiply count by N
         count = 1
-        while self.peek() == "LBRACKET":
-            self.match("LBRACKET")
-            size = int(self.current["tokenText"])
-            self.match("ICONST")
-            self.match("RBRACKET")
-            count *= size
-        return name, count
+        dims = []
+        while self.peek() == LBRACKET:
+            self.match(LBRACKET)
+            size = self.current.text
+            self.match(ICONST)
+            self.match(RBRACKET)
+            count *= int(size)
+            dims.append(int(size))
+        return name, count, tuple(dims)
 
 
     # variabletail => LBRACKET ICONST RBRACKET variabletail | eps
     def parse_variabletail(self):
-        if self.peek() == "LBRACKET":
-            self.match("LBRACKET"); self.match("ICONST"); self.match("RBRACKET")
+        if self.peek() == LBRACKET:
+            self.match(LBRACKET); self.match(ICONST); self.match(RBRACKET)
             self.parse_variabletail()
 
     # typespec => INT | FLOAT
     def parse_typespec(self):
-        if self.peek() in ("INT","FLOAT"):
+        if self.peek() in (INT,FLOAT):
             self.match(self.peek())
         else:
             self.error("Expected INT or FLOAT in typespec")
 
     # bstatementlist => LBRACE statementlist RBRACE
     def parse_bstatementlist(self):
-        self.match("LBRACE")
+        self.match(LBRACE)
         # block scope
         self.symtab.enterScope()
         self.parse_statementlist()
         self.symtab.exitScope()
-        self.match("RBRACE")
+        self.match(RBRACE)
 
     # statementlist => statement statementlisttail | eps
-    def parse_statementlist(self):
-        if self.peek() in ("WHILE","IF","ID","PRINT","READ","RETURN","CALL"):
-            self.parse_statement()
-            self.parse_statementlisttail()
-
     # statementlisttail => SEMICOLON statementlist | eps
-    def parse_statementlisttail(self):
-        if self.peek() == "SEMICOLON":
-            self.match("SEMICOLON")
-            self.parse_statementlist()
+    # every statement list is closed by its block's RBRACE, anything else
+    # where the list ends is reported here (as the block would) so the
+    # list can go on after it
+    def parse_statementlist(self):
+        while True:
+            try:
+                while self.peek() in STATEMENT_KINDS:
+                    self.parse_statement()
+                    # statementlisttail
+                    if self.peek() != SEMICOLON:
+                        break
+                    self.match(SEMICOLON)
+                if self.peek() == RBRACE:
+                    return
+                self.error("Expected RBRACE")
+            except ParseError as e:
+                if self.recover(e) != SEMICOLON:
+                    return
+                self.match(SEMICOLON)
 
     # statement => whilestatement | ifstatement | assignmentstatement | printstatement | readstatement | returnstatement | callstatement
     def parse_statement(self):
         tok = self.peek()
-        if tok == "WHILE": self.parse_whilestatement()
-        elif tok == "IF": self.parse_ifstatement()
-        elif tok == "ID": self.parse_assignmentstatement()
-        elif tok == "PRINT": self.parse_printstatement()
-        elif tok == "READ": self.parse_readstatement()
-        elif tok == "RETURN": self.parse_returnstatement()
-        elif tok == "CALL": self.parse_callstatement()
+        if tok == WHILE: self.parse_whilestatement()
+        elif tok == IF: self.parse_ifstatement()
+        elif tok == ID: self.parse_assignmentstatement()
+        elif tok == PRINT: self.parse_printstatement()
+        elif tok == READ: self.parse_readstatement()
+        elif tok == RETURN: self.parse_returnstatement()
+        elif tok == CALL: self.parse_callstatement()
         else: self.error("Expected statement")
 
     # whilestatement => WHILE relationalexpr bstatementlist
     def parse_whilestatement(self):
-        self.match("WHILE")
-        self.match("LPAREN")
+        self.match(WHILE)
+        self.match(LPAREN)
         cond = self.parse_relationalexpr()
-        self.match("RPAREN")
+        self.match(RPAREN)
         start=self.IR.new_label(); end=self.IR.new_label()
         self.IR.emit('.label',0,0,start)
         self.IR.emit('beq',cond.location,0,end)
@@ -243,21 +399,21 @@ class Parser:
 
     # ifstatement => IF relationalexpr bstatementlist istail
     def parse_ifstatement(self):
-        self.match("IF")
-        self.match("LPAREN")
+        self.match(IF)
+        self.match(LPAREN)
         cond = self.parse_relationalexpr()
-        self.match("RPAREN")
+        self.match(RPAREN)
         # for or && after the first conditional
-        while self.peek() in ("OR","AND"):
-            op = self.current["token"]
+        while self.peek() in (OR,AND):
+            op = self.current.kind
             self.match(op)
-            self.match("LPAREN")
+            self.match(LPAREN)
             right = self.parse_relationalexpr()
-            self.match("RPAREN")
+            self.match(RPAREN)
 
             # fold into one boolean temp
             temp = self.IR.new_temp()
-            instr = "or" if op=="OR" else "and"
+            instr = "or" if op==OR else "and"
             self.IR.emit(instr, cond.location, right.location, temp)
             cond = ExprAttr("INT", temp)
         els=self.IR.new_label(); end=self.IR.new_label()
@@ -270,28 +426,28 @@ class Parser:
 
     # istail => ELSE bstatementlist | eps
     def parse_istail(self):
-        if self.peek() == "ELSE":
-            self.match("ELSE")
+        if self.peek() == ELSE:
+            self.match(ELSE)
             self.parse_bstatementlist()
 
     # assignmentstatement => usevariable ASSIGN otherexpression SEMICOLON
     def parse_assignmentstatement(self):
         lhs=self.parse_usevariable()
-        self.match('ASSIGN')
+        self.match(ASSIGN)
         rhs=self.parse_otherexpression()
         op='sw' if rhs.type=='INT' else 'fsw'
         self.IR.emit(op,rhs.location,0,lhs.location)
 
     # printstatement => PRINT otherexpression SEMICOLON
     def parse_printstatement(self):
-        self.match('PRINT')
+        self.match(PRINT)
         expr=self.parse_otherexpression()
         trap=2 if expr.type=='INT' else 4
         self.IR.emit('syscall',trap,expr.location,0)
 
     # readstatement => READ usevariable SEMICOLON
     def parse_readstatement(self):
-        self.match('READ')
+        self.match(READ)
         lhs=self.parse_usevariable()
         trap=1 if lhs.type=='INT' else 3
         tmp=self.IR.new_temp() if lhs.type=='INT' else self.IR.new_ftemp()
@@ -300,76 +456,86 @@ class Parser:
 
     # returnstatement => RETURN [otherexpression] SEMICOLON
     def parse_returnstatement(self):
-        self.match('RETURN')
-        if self.peek() in ('ID','ICONST','FCONST','LPAREN','MINUS'):
+        self.match(RETURN)
+        if self.peek() in (ID,ICONST,FCONST,LPAREN,MINUS):
             expr=self.parse_otherexpression()
             self.IR.emit('return',expr.location,0,0)
 
     # callstatement => CALL ID LPAREN [args] RPAREN SEMICOLON
     def parse_callstatement(self):
-        self.match('CALL')
-        fname=self.current['tokenText']; self.match('ID')
-        self.match('LPAREN')
+        self.match(CALL)
+        fname=self.current.text; self.match(ID)
+        self.match(LPAREN)
         args=[]
-        if self.peek() != 'RPAREN':
+        if self.peek() != RPAREN:
             expr=self.parse_otherexpression(); args.append(expr)
-            while self.peek()==',': self.match(','); expr=self.parse_otherexpression(); args.append(expr)
-        self.match('RPAREN')
+            while self.peek()==COMMA: self.match(COMMA); expr=self.parse_otherexpression(); args.append(expr)
+        self.match(RPAREN)
         for arg in args: self.IR.emit('param',arg.location,0,0)
         self.IR.emit('call',fname,len(args),0)
 
     # otherexpression => term otherexpressiontail
+    # term => factor termtail
     def parse_otherexpression(self):
-        left=self.parse_term()
-        return self.parse_otherexpressiontail(left)
-
-    def parse_otherexpressiontail(self,left_attr):
-        if self.peek() in ('PLUS','MINUS'):
-            op=self.current['token']; self.match(op)
-            right=self.parse_term()
-            if left_attr.type != right.type:
-                if left_attr.type=='INT': tmp=self.IR.new_ftemp(); self.IR.emit('tf',left_attr.location,0,tmp); left_attr=ExprAttr('FLOAT',tmp)
-                else: tmp=self.IR.new_ftemp(); self.IR.emit('tf',right.location,0,tmp); right=ExprAttr('FLOAT',tmp)
-            instr='add' if op=='PLUS' else 'sub'
-            if left_attr.type=='FLOAT': instr='f'+instr; dest=self.IR.new_ftemp()
-            else: dest=self.IR.new_temp()
-            self.IR.emit(instr,left_attr.location,right.location,dest)
-            return self.parse_otherexpressiontail(ExprAttr(left_attr.type,dest))
-        return left_attr
-
-    def parse_term(self):
-        left=self.parse_factor()
-        return self.parse_termtail(left)
-
-    def parse_termtail(self,left_attr):
-        if self.peek() in ('MULT','DIV'):
-            op=self.current['token']; self.match(op)
-            right=self.parse_factor()
-            if left_attr.type != right.type:
-                if left_attr.type=='INT': tmp=self.IR.new_ftemp(); self.IR.emit('tf',left_attr.location,0,tmp); left_attr=ExprAttr('FLOAT',tmp)
-                else: tmp=self.IR.new_ftemp(); self.IR.emit('tf',right.location,0,tmp); right=ExprAttr('FLOAT',tmp)
-            instr='mul' if op=='MULT' else 'div'
-            if left_attr.type=='FLOAT': instr='f'+instr; dest=self.IR.new_ftemp()
-            else: dest=self.IR.new_temp()
-            self.IR.emit(instr,left_attr.location,right.location,dest)
-            return self.parse_termtail(ExprAttr(left_attr.type,dest))
-        return left_attr
+        return self.parse_expression(ADDITIVE)
+
+    # relationalexpr => otherexpression (relop otherexpression)* ((AND | OR) relationalexpr)*
+    def parse_relationalexpr(self):
+        return self.parse_expression(BOOLEAN)
+
+    # precedence climbing over the operator table (BINARY_OPERATORS)
+    # parses factors joined by operators of precedence >= min_prec; operators
+    # waiting for their right operand are kept on a stack and folded (their
+    # code emitted) as soon as a weaker operator or the end is seen, so the
+    # quads come out in the same order as the recursive grammar's
+    # (a post-order walk of the expression)
+    def parse_expression(self, min_prec):
+        operators = self.operators
+        target = self.target
+        pending = []    # (left operand, operator entry)
+        left = self.parse_factor()
+        while True:
+            op = operators.get(self.current.kind)
+            if op is None or op[0] < min_prec:
+                break
+            prec = op[0]
+            # fold what binds tighter (or as tight, left-associative)
+            while pending and (pending[-1][1][0] > prec or
+                               (pending[-1][1][0] == prec and not op[1])):
+                lhs, lop = pending.pop()
+                left = lop[3](target, lop[2], lhs, left)
+            try:
+                self.current = self.nextToken()
+            except LexerError as e:
+                self.current = self.advance(e)
+            pending.append((left, op))
+            left = self.parse_factor()
+        while pending:
+            lhs, lop = pending.pop()
+            left = lop[3](target, lop[2], lhs, left)
+        return left
 
     def parse_factor(self):
         tok = self.peek()
     
-        # function‐call expression
-        if tok == 'ID' and self.current['tokenText'] in self.functions:
-            fname = self.current['tokenText']
-            self.match('ID')
-            self.match('LPAREN')
+        # function‐call expression, or variable reference
+        if tok == ID:
+            fname = self.current.text
+            pos = self.current.pos
+            self.match(ID)
+            if not self.functions.declared(fname, pos):
+                # ID ( may call a function declared further on
+                if self.peek() != LPAREN:
+                    return self.parse_usevariable(fname)
+                self.forward_call(fname)
+            self.match(LPAREN)
             args = []
-            if self.peek() != 'RPAREN':
+            if self.peek() != RPAREN:
                 args.append(self.parse_otherexpression())
-                while self.peek() == 'COMMA':
-                    self.match('COMMA')
+                while self.peek() == COMMA:
+                    self.match(COMMA)
                     args.append(self.parse_otherexpression())
-            self.match('RPAREN')
+            self.match(RPAREN)
     
             for arg in args:
                 self.IR.emit('param', arg.location, 0, 0)
@@ -377,36 +543,32 @@ class Parser:
             self.IR.emit('call', fname, len(args), ret)
             return ExprAttr('INT', ret)
     
-        # variable reference
-        if tok == 'ID':
-            return self.parse_usevariable()
-    
         # integer literal
-        if tok == 'ICONST':
-            val = int(self.current['tokenText'])
-            self.match('ICONST')
+        if tok == ICONST:
+            val = int(self.current.text)
+            self.match(ICONST)
             temp = self.IR.new_temp()
             self.IR.emit('li', val, 0, temp)
             return ExprAttr('INT', temp)
     
         # float literal
-        if tok == 'FCONST':
-            val = float(self.current['tokenText'])
-            self.match('FCONST')
+        if tok == FCONST:
+            val = float(self.current.text)
+            self.match(FCONST)
             temp = self.IR.new_ftemp()
             self.IR.emit('fl', val, 0, temp)
             return ExprAttr('FLOAT', temp)
     
         # parenthesized sub‐expression
-        if tok == 'LPAREN':
-            self.match('LPAREN')
+        if tok == LPAREN:
+            self.match(LPAREN)
             expr = self.parse_otherexpression()
-            self.match('RPAREN')
+            self.match(RPAREN)
             return expr
     
         # unary minus
-        if tok == 'MINUS':
-            self.match('MINUS')
+        if tok == MINUS:
+            self.match(MINUS)
             expr = self.parse_factor()
             instr = 'sub' if expr.type == 'INT' else 'fsub'
             # choose the right temp based on type
@@ -416,9 +578,11 @@ class Parser:
             return ExprAttr(expr.type, dest)
         self.error("Expected factor")
     
-    def parse_usevariable(self):
-        name = self.current['tokenText']
-        self.match('ID')
+    # name is the ID's when the caller has matched it already
+    def parse_usevariable(self, name=None):
+        if name is None:
+            name = self.current.text
+            self.match(ID)
 
         # local lookup
         sym = self.symtab.lookup(name)
@@ -426,10 +590,10 @@ class Parser:
         if sym is None:
             self.error(f"Undeclared variable {name}")
         # array indexing
-        if self.peek()=='LBRACKET':
-            self.match('LBRACKET')
+        if self.peek()==LBRACKET:
+            self.match(LBRACKET)
             idx = self.parse_otherexpression()
-            self.match('RBRACKET')
+            self.match(RBRACKET)
 
             # pick the right storage
             if sym is None and name in self.globals:
@@ -468,26 +632,22 @@ class Parser:
 
         return ExprAttr(typ, val)
 
-    def parse_relationalexpr(self):
-        # a in a == b
-        left = self.parse_otherexpression()
-        # Relational operators including NOTEQUAL
-        while self.peek() in ('LT','LE','GT','GE','EQUAL','NOTEQUAL'):
-            op = self.current['token']
-            self.match(op)
-            right = self.parse_otherexpression()
-            dest = self.IR.new_temp()
-            # map NOTEQUAL to 'ne'
-            instr = op.lower() if op != 'NOTEQUAL' else 'ne'
-            self.IR.emit(instr, left.location, right.location, dest)
-            left = ExprAttr('INT', dest)
-        # Boolean chaining: AND / OR
-        while self.peek() in ('AND', 'OR'):
-            op = self.current['token']
-            self.match(op)
-            right = self.parse_relationalexpr()
-            dest = self.IR.new_temp()
-            instr = 'and' if op == 'AND' else 'or'
-            self.IR.emit(instr, left.location, right.location, dest)
-            left = ExprAttr('INT', dest)
-        return left
+# expression precedence levels
+BOOLEAN, RELATIONAL, ADDITIVE, MULTIPLICATIVE = 1, 2, 3, 4
+
+# binary operators: token kind => (precedence, right associative, instruction,
+# IRCode emitter); && and || share one level and group to the right
+BINARY_OPERATORS = {
+    OR:       (BOOLEAN,        True,  'or',    IRCode.emit_compare),
+    AND:      (BOOLEAN,        True,  'and',   IRCode.emit_compare),
+    LT:       (RELATIONAL,     False, 'lt',    IRCode.emit_compare),
+    LE:       (RELATIONAL,     False, 'le',    IRCode.emit_compare),
+    GT:       (RELATIONAL,     False, 'gt',    IRCode.emit_compare),
+    GE:       (RELATIONAL,     False, 'ge',    IRCode.emit_compare),
+    EQUAL:    (RELATIONAL,     False, 'equal', IRCode.emit_compare),
+    NOTEQUAL: (RELATIONAL,     False, 'ne',    IRCode.emit_compare),
+    PLUS:     (ADDITIVE,       False, 'add',   IRCode.emit_arithmetic),
+    MINUS:    (ADDITIVE,       False, 'sub',   IRCode.emit_arithmetic),
+    MULT:     (MULTIPLICATIVE, False, 'mul',   IRCode.emit_arithmetic),
+    DIV:      (MULTIPLICATIVE, False, 'div',   IRCode.emit_arithmetic),
+}
@@ -1,6 +1,11 @@
+import os
 import sys
-from lexer import initLexer
+from lexer import initLexer, LexerSession, LexerError
 from parser import Parser
+from stm import RETAIN_NONE
+
+# the optional modes are imported only when they are switched on, so the
+# default compile does not load them
 
 def main():
     if len(sys.argv) != 2:
@@ -8,18 +13,92 @@ def main():
         sys.exit(1)
 
     src = sys.argv[1]
-    # Initialize lexer on the given file
-    if not initLexer(src):
+    # RASCL_AST=1 parses into a tree first and generates the IR from it,
+    # RASCL_LL=1 parses with the LL(1) table generated from the grammar,
+    # otherwise the single-pass Parser emits the IR while parsing
+    use_tree = os.environ.get('RASCL_AST', '') not in ('', '0')
+    if use_tree:
+        from tree import TreeParser
+        parser_class = TreeParser
+    elif os.environ.get('RASCL_LL', '') not in ('', '0'):
+        from llparser import TableParser
+        parser_class = TableParser
+    else:
+        parser_class = Parser
+    # RASCL_JOBS=N compiles the functions in N processes (single-pass
+    # Parser only; small programs are still compiled in one)
+    jobs = int(os.environ.get('RASCL_JOBS', '0') or 0)
+    # RASCL_PROFILE=<file> writes a per-production and per-function
+    # profile of the parse, JSON for a .json file, else folded stacks
+    profile_file = os.environ.get('RASCL_PROFILE')
+    # RASCL_INCREMENTAL=<dir> keeps the IR of each function there and
+    # only compiles the functions that changed (single-pass Parser only)
+    fragment_dir = os.environ.get('RASCL_INCREMENTAL')
+    if parser_class is not Parser or profile_file:
+        jobs = 0
+        fragment_dir = None
+    if profile_file:
+        from parseprof import profiled
+        parser_class = profiled(parser_class)
+    # token cache directory (optional), unchanged files are not re-lexed
+    cache_dir = os.environ.get('RASCL_TOKEN_CACHE')
+    tokens = None
+    fragments = None
+    if fragment_dir:
+        from incremental import FragmentCache, compile_incremental
+        fragment_size = int(os.environ.get('RASCL_INCREMENTAL_SIZE', 64 * 1024 * 1024))
+        fragments = FragmentCache(fragment_dir, fragment_size)
+    if jobs > 1:
+        from parallel import read_tokens, compile_parallel
+    try:
+        if fragments is not None:
+            tokens = fragments.tokens(src)
+        elif cache_dir:
+            from tokencache import TokenCache
+            cache_size = int(os.environ.get('RASCL_TOKEN_CACHE_SIZE', 64 * 1024 * 1024))
+            tokens = TokenCache(cache_dir, cache_size).tokens(src)
+        elif jobs > 1:
+            tokens = read_tokens(src)
+    except IOError:
         print(f"Failed to open file: {src}")
         sys.exit(1)
+    except LexerError:
+        # lexed as it is parsed below, which reports all the errors
+        tokens = None
+
+    IR = None
+    if fragments is not None and tokens is not None:
+        IR = compile_incremental(tokens, fragments, jobs)
+    elif jobs > 1 and tokens is not None:
+        IR = compile_parallel(tokens, jobs)
+    if IR is None:
+        # a scope is not looked at once the IR of its function is
+        # emitted, so the compile drops each one as it is exited
+        if tokens is not None:
+            parser = parser_class(LexerSession(buffer=tokens), retention=RETAIN_NONE)
+        else:
+            # Initialize lexer on the given file
+            if not initLexer(src):
+                print(f"Failed to open file: {src}")
+                sys.exit(1)
+            parser = parser_class(retention=RETAIN_NONE)
 
-    # Run parser and trace
-    parser = Parser()
-    parser.parse_Program()
+        # Run parser and trace, print every error found
+        parser.parse_Program()
+        if profile_file:
+            parser.profile.write(profile_file)
+        if parser.errors:
+            for error in parser.errors:
+                print(error)
+            sys.exit(1)
+        if use_tree:
+            from codegen import CodeGenerator
+            CodeGenerator(parser.arena, parser.IR).generate()
+        IR = parser.IR
 
     # after parsing -> emit segments and write output
     out_file = src.rsplit('.', 1)[0] + '.rso'
-    parser.IR.write(out_file)
+    IR.write(out_file)
     print(f"Generated IR in {out_file}")
 
 if __name__ == "__main__":
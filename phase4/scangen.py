@@ -0,0 +1,107 @@
+# scangen.py
+# builds the lexer's token set (scantab.py) from the TERMINALS section
+# of the RASCL grammar file (rascl.gmr by default)
+#
+#   python3 scangen.py [grammar file] [output module]
+#
+# keywords and operators come from the grammar, so a terminal added there
+# reaches the lexer by regenerating; the patterns stay in lexer.py
+import os
+import re
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GRAMMAR = os.path.join(HERE, 'rascl.gmr')
+OUTPUT = os.path.join(HERE, 'scantab.py')
+
+USAGE = "Usage: python3 scangen.py [grammar file] [output module]"
+
+# identifiers may also use _, which the grammar's ID does not spell out;
+# a literal terminal spelled like an identifier is a keyword
+IDENT = r'[a-zA-Z_][a-zA-Z0-9_]*'
+
+# read the TERMINALS section: NAME==>"text" per line, up to the first
+# line that is not a terminal.  MAIN=>"main" (single =) is accepted too
+def read_terminals(filename):
+    terminals = []
+    with open(filename, 'r') as f:
+        lines = f.read().splitlines()
+    started = False
+    for line in lines:
+        line = line.strip()
+        if not started:
+            started = line == 'TERMINALS'
+            continue
+        if not line:
+            continue
+        if '=>' not in line:
+            break
+        name, text = line.split('=>', 1)
+        name = name.rstrip('=').strip()
+        text = text.strip()
+        if len(text) < 2 or text[0] != '"' or text[-1] != '"':
+            raise ValueError(f"bad terminal line: {line}")
+        terminals.append((name, text[1:-1]))
+    return terminals
+
+# the grammar writes operators as plain strings ("*", "||", "[") and only
+# ID, ICONST and FCONST as regular expressions: a terminal is read as a
+# regular expression when it has a character class or an escape
+def is_pattern(text):
+    return '\\' in text or ('[' in text and ']' in text and len(text) > 2)
+
+# the token set: (keywords, operators), each [(name, text)] in grammar
+# order.  the patterns (ID, ICONST, FCONST) and $$ are left to the lexer
+def token_set(grammar_terminals):
+    keywords = []
+    operators = []
+    for name, text in grammar_terminals:
+        if is_pattern(text) or name == 'DD':
+            continue
+        if re.fullmatch(IDENT, text):
+            keywords.append((name, text))
+        else:
+            operators.append((name, text))
+    return keywords, operators
+
+def generate(grammar, output):
+    keywords, operators = token_set(read_terminals(grammar))
+    out = []
+    out.append("# scantab.py")
+    out.append("# generated by scangen.py from the grammar TERMINALS section - do not edit")
+    out.append("")
+    out.append("# the token set, for the lexer: keyword => name, operator => name")
+    out.append("KEYWORDS = {")
+    for name, text in keywords:
+        out.append(f"    {text!r}: {name!r},")
+    out.append("}")
+    out.append("OPERATORS = {")
+    for name, text in operators:
+        out.append(f"    {text!r}: {name!r},")
+    out.append("}")
+    out.append("")
+    with open(output, 'w') as f:
+        f.write('\n'.join(out))
+
+def main():
+    args = sys.argv[1:]
+    if args and args[0] in ('-h', '--help'):
+        print(USAGE)
+        sys.exit(0)
+    if len(args) > 2 or any(arg.startswith('-') for arg in args):
+        print(USAGE)
+        sys.exit(1)
+    grammar = args[0] if args else GRAMMAR
+    output = args[1] if len(args) > 1 else OUTPUT
+    try:
+        generate(grammar, output)
+    except OSError as e:
+        print(f"Failed to open file: {e.filename}")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"{grammar}: {e}")
+        sys.exit(1)
+    print(f"Generated the token set in {output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+# scantab.py
+# generated by scangen.py from the grammar TERMINALS section - do not edit
+
+# the token set, for the lexer: keyword => name, operator => name
+KEYWORDS = {
+    'int': 'INT',
+    'float': 'FLOAT',
+    'void': 'VOID',
+    'function': 'FUNCTION',
+    'print': 'PRINT',
+    'read': 'READ',
+    'while': 'WHILE',
+    'if': 'IF',
+    'else': 'ELSE',
+    'return': 'RETURN',
+    'call': 'CALL',
+    'main': 'MAIN',
+}
+OPERATORS = {
+    ';': 'SEMICOLON',
+    '{': 'LBRACE',
+    '}': 'RBRACE',
+    ',': 'COMMA',
+    '[': 'LBRACKET',
+    ']': 'RBRACKET',
+    '=': 'ASSIGN',
+    '(': 'LPAREN',
+    ')': 'RPAREN',
+    '*': 'MULT',
+    '/': 'DIV',
+    '+': 'PLUS',
+    '-': 'MINUS',
+    '!': 'NOT',
+    '&&': 'AND',
+    '||': 'OR',
+    '==': 'EQUAL',
+    '<': 'LT',
+    '<=': 'LE',
+    '>': 'GT',
+    '>=': 'GE',
+    '!=': 'NOTEQUAL',
+}
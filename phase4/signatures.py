@@ -0,0 +1,87 @@
+# signatures.py
+# the function signatures of a program, collected before it is parsed
+#
+# at an ID in a factor the parser has to know whether the name is a
+# function (a call) or a variable.  the rule is the same in every mode: a
+# function declared before the ID is called, any other name is a variable
+# unless ( follows it, which makes it a call to a function declared
+# further on (checked when the parse ends, Parser.forward_call)
+# the Parser collects the functions in a FunctionIndex as it declares
+# them.  the parallel and incremental compiles parse the functions out of
+# order, so they skim the token kinds for every function header first
+#   FUNCTION ftypespec ID LPAREN [fparm {COMMA fparm}] RPAREN
+#   fparm => typespec ID [LBRACKET RBRACKET]
+# and the index keeps where each one is declared, which answers "declared
+# before this ID" for a function parsed on its own as it would be
+# answered in order.  the rest of the syntax is left to the parse
+import re
+
+from lexer import (TOKEN_NAMES, ID, FUNCTION, VOID, INT, FLOAT,
+                   LPAREN, RPAREN, COMMA, LBRACKET, RBRACKET)
+
+def byte(k):
+    return re.escape(bytes((k,)))
+
+def byte_class(*ks):
+    return b'[' + re.escape(bytes(ks)) + b']'
+
+# a function header as a regex over the kinds bytes of a token stream,
+# one byte per token; the name is 2 tokens after FUNCTION, the arity the
+# number of IDs after it
+FPARM = byte_class(INT, FLOAT) + byte(ID) + b'(?:' + byte(LBRACKET) + byte(RBRACKET) + b')?'
+HEADER = re.compile(byte(FUNCTION) + byte_class(VOID, INT, FLOAT) + byte(ID) + byte(LPAREN) +
+                    b'(?:' + FPARM + b'(?:' + byte(COMMA) + FPARM + b')*)?' + byte(RPAREN))
+
+class FunctionIndex:
+    """
+    the functions of a program: name => (return type, arity), the return
+    type as parse_ftypespec gives it ('VOID', 'INT' or 'FLOAT'), and
+    name => source offset of the name in its declaration
+    the set of functions the parser declares (in, add, declared); the first
+    declaration of a name is the one kept
+    """
+
+    def __init__(self, signatures=None, positions=None):
+        self.signatures = {} if signatures is None else signatures
+        self.positions = {} if positions is None else positions
+
+    def __contains__(self, name):
+        return name in self.signatures
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def __iter__(self):
+        return iter(self.signatures)
+
+    # (return type, arity) of function name, None if it is not one
+    def get(self, name):
+        return self.signatures.get(name)
+
+    # whether name is a function declared before source offset pos
+    def declared(self, name, pos):
+        return self.positions.get(name, pos) < pos
+
+    # a function declared at source offset pos (typ, arity None if unknown)
+    def add(self, name, typ=None, arity=None, pos=-1):
+        self.signatures.setdefault(name, (typ, arity))
+        self.positions.setdefault(name, pos)
+
+# index_headers
+# FunctionIndex of the headers in kinds (bytes), text_of(i) the text of
+# the ID token i, starts[i] its source offset
+def index_headers(kinds, text_of, starts):
+    signatures = {}
+    positions = {}
+    for m in HEADER.finditer(kinds):
+        i = m.start()
+        name = text_of(i + 2)
+        if name not in signatures:
+            signatures[name] = (TOKEN_NAMES[kinds[i + 1]], m.group().count(ID) - 1)
+            positions[name] = starts[i + 2]
+    return FunctionIndex(signatures, positions)
+
+# skim_buffer
+# FunctionIndex of the program in a TokenBuffer
+def skim_buffer(buffer):
+    return index_headers(buffer.kinds.tobytes(), buffer.tokenText, buffer.starts)
@@ -1,18 +1,48 @@
 # stm.py Symbol Table Manager 
 
+# kinds of symbol
+VARIABLE = 'var'
+PARAMETER = 'param'
+FUNCTION = 'function'
+
+# scope retention policies: which closed scopes stay in the table
+RETAIN_ALL = 'all'              # every scope (the default)
+RETAIN_FUNCTIONS = 'functions'  # function scopes, not the blocks inside them
+RETAIN_NONE = 'none'            # none, a scope is dropped when it is exited
+
+# attributes kept in SymbolInfo fields rather than its attributes dict
+CORE_ATTRIBUTES = ('type', 'memory_location', 'dims', 'kind', 'offset')
+
+# bytes per element of each type; parameters (which have no type) and
+# array parameters (passed by reference) take one word
+ELEMENT_SIZE = {'INT': 4, 'FLOAT': 4}
+WORD = 4
+
 class SymbolInfo:
     """
     hold identifier(array of ch or str) : str
-    hold a set of attrbiutes appropriate about the identifier : dict
     type field   : str
     mem location : num
+    dims         : tuple of array bounds, () for a scalar (None for the
+                   unknown bound of an array parameter)
+    kind         : VARIABLE, PARAMETER or FUNCTION
+    offset       : byte offset in the data segment (globals) or in the
+                   frame of the function (parameters, locals), see
+                   FrameLayout; None for a function
+    hold a set of further attrbiutes about the identifier : dict, None
+    until the first one is added (most symbols never get any)
+    slotted, a program may declare a great many of them
     """
+    __slots__ = ('identifier', 'type', 'memory_location', 'dims', 'kind', 'offset', 'attributes')
 
-    def __init__(self, identifier, type, memory_location):
+    def __init__(self, identifier, type, memory_location, dims=(), kind=VARIABLE):
         self.identifier = identifier   
         self.type = type
         self.memory_location = memory_location
-        self.attributes = {}            
+        self.dims = dims
+        self.kind = kind
+        self.offset = None
+        self.attributes = None
         
     # human readable
     def __str__(self):
@@ -20,14 +50,87 @@ class SymbolInfo:
         details = {
             "identifier": self.identifier,
             "type": self.type,
-            "memory_location": self.memory_location
+            "memory_location": self.memory_location,
+            "dims": self.dims,
+            "kind": self.kind,
+            "offset": self.offset
         }
         # some attrbiutes that will be added
-        details.update(self.attributes)
+        if self.attributes:
+            details.update(self.attributes)
         return f"SymbolInfo(details={details})"
 
+class FrameLayout:
+    """
+    storage of the variables as the symbol table sees them declared
+    globals are laid out one after the other in the data segment, the
+    parameters and then the locals of a function in its frame, each at
+    a byte offset from the start; the locals of a block are released when
+    it is exited, so sibling blocks share their space and a frame is as
+    large as its deepest path of blocks
+    data_size   : bytes of the data segment
+    frame_sizes : function name => bytes of its frame
+    """
+
+    def __init__(self, sizes=ELEMENT_SIZE):
+        self.sizes = sizes
+        self.data_size = 0
+        self.frame_sizes = {}
+        self.frame = None       # name of the open frame
+        self.top = 0            # first free byte of the open frame
+        self.blocks = []        # top at the entry of each open block
+
+    # bytes of the storage of symbol
+    def size(self, symbol):
+        if symbol.kind == PARAMETER:
+            return WORD
+        size = self.sizes.get(symbol.type, WORD)
+        for bound in symbol.dims:
+            size *= bound
+        return size
+
+    def openFrame(self, name):
+        self.frame = name
+        self.top = 0
+        self.blocks = []
+        self.frame_sizes[name] = 0
+
+    def closeFrame(self):
+        self.frame = None
+
+    def enterBlock(self):
+        self.blocks.append(self.top)
+
+    def exitBlock(self):
+        self.top = self.blocks.pop()
+
+    # sets the offset of a new variable or parameter symbol
+    def allocate(self, symbol, is_global):
+        if symbol.kind == FUNCTION:
+            return
+        size = self.size(symbol)
+        if is_global or self.frame is None:
+            symbol.offset = self.data_size
+            self.data_size += size
+        else:
+            symbol.offset = self.top
+            self.top += size
+            if self.top > self.frame_sizes[self.frame]:
+                self.frame_sizes[self.frame] = self.top
+
 class SymbolTableManager:
-    def __init__(self):
+    """
+    scopes are numbered in the order they are entered, 0 is global
+    retention decides which scopes are still in symbol_table once exited
+    (RETAIN_ALL, RETAIN_FUNCTIONS or RETAIN_NONE); the scopes entered from
+    the global scope are the function scopes.  listeners see a scope
+    before it is dropped
+    layout gives each variable its offset (FrameLayout) as it is added
+    """
+
+    def __init__(self, retention=RETAIN_ALL):
+        self.retention = retention
+        self.scope_listeners = []
         self.initSymTab()
 
     def initSymTab(self):
@@ -35,8 +138,12 @@ class SymbolTableManager:
         self.current_scope = 0      # holds the identifier in the active scope
         self.scope_stack = [0]      # stack to store scopes
         self.last_scope = 0         # last used scope 
+        self.bindings = {}          # identifier => its SymbolInfos in the open scopes, innermost last
+        self.declared_in = {}       # identifier => set of the scopes declaring it
+        self.function_scopes = set()  # scopes entered from the global scope
+        self.layout = FrameLayout() # offsets of the variables, frame sizes
 
-    def enterScope(self):
+    def enterScope(self, name=None):
         """
         enters new scope +1
         all symbols added will be defined in the scope until exitScope()
@@ -44,11 +151,18 @@ class SymbolTableManager:
         scopes asigned monotonically increasing seq
         0 = global scope
         each new function definition increments last used scope number
+        name: of the function, for a scope entered from the global scope
+        (its frame in layout.frame_sizes; the scope number if not given)
         returns:
             last used scope number
         """
         self.last_scope += 1
         new_scope = self.last_scope
+        if len(self.scope_stack) == 1:
+            self.function_scopes.add(new_scope)
+            self.layout.openFrame(new_scope if name is None else name)
+        else:
+            self.layout.enterBlock()
         self.current_scope = new_scope
         self.scope_stack.append(new_scope)
         self.symbol_table[new_scope] = {}
@@ -57,19 +171,83 @@ class SymbolTableManager:
     def exitScope(self):
         """
         reverts current scope to the global scope 0 
-        only resetting the current scope to global no removal from the table
+        only resetting the current scope to global, the scope is removed
+        from the table only if the retention policy does not keep it
         """
         if len(self.scope_stack) > 1:
-            self.scope_stack.pop() # exit the current scope
+            scope = self.scope_stack.pop() # exit the current scope
+            # its symbols are no longer visible
+            bindings = self.bindings
+            for identifier in self.symbol_table[scope]:
+                stack = bindings[identifier]
+                stack.pop()
+                if not stack:
+                    del bindings[identifier]
             self.current_scope = self.scope_stack[-1]  # current scope replaced by top stack
+            if len(self.scope_stack) == 1:
+                self.layout.closeFrame()
+            else:
+                self.layout.exitBlock()
+            if not self.retains(scope, self.retention):
+                self.dropScope(scope)
         else:
             self.current_scope = 0
 
-    def addSymbol(self, identifier, type=None, memory_location=None):
+    def retains(self, scope, retention):
+        """
+        whether a closed scope is kept under the retention policy
+        """
+        if retention == RETAIN_ALL:
+            return True
+        if retention == RETAIN_FUNCTIONS:
+            return scope in self.function_scopes
+        return False
+
+    def addScopeListener(self, listener):
+        """
+        listener(scope, symbols) is called with every scope dropped from
+        the table (symbols: identifier => SymbolInfo), before it is dropped
+        e.g. to write debug information or a cross reference of it
+        """
+        self.scope_listeners.append(listener)
+
+    def dropScope(self, scope):
+        """
+        removes a closed scope from the table, after the listeners saw it
+        """
+        symbols = self.symbol_table[scope]
+        for listener in self.scope_listeners:
+            listener(scope, symbols)
+        del self.symbol_table[scope]
+        self.function_scopes.discard(scope)
+        declared_in = self.declared_in
+        for identifier in symbols:
+            scopes = declared_in[identifier]
+            scopes.discard(scope)
+            if not scopes:
+                del declared_in[identifier]
+
+    def compact(self, retention=RETAIN_NONE):
+        """
+        drops the closed scopes still in the table that the retention
+        policy does not keep (all of them by default), e.g. once the IR
+        of the functions they belong to is written
+        returns:
+            int: the number of scopes dropped
+        """
+        open_scopes = set(self.scope_stack)
+        closed = [scope for scope in self.symbol_table
+                  if scope not in open_scopes and not self.retains(scope, retention)]
+        for scope in closed:
+            self.dropScope(scope)
+        return len(closed)
+
+    def addSymbol(self, identifier, type=None, memory_location=None, dims=(), kind=VARIABLE):
         """
         adds a Symbolinfo record to the table
         only contain the identifier at init
         minimial information added to the current scope
+        dims and kind as in SymbolInfo
         should override the the attributes 
         returns:
             bool: True if the symbol is added to the table, 
@@ -79,8 +257,19 @@ class SymbolTableManager:
         # symbol already exists in this scope
         if identifier in self.symbol_table[scope]:
             return False  
-        symbol = SymbolInfo(identifier, type, memory_location)
+        symbol = SymbolInfo(identifier, type, memory_location, dims, kind)
+        self.layout.allocate(symbol, scope == 0)
         self.symbol_table[scope][identifier] = symbol
+        stack = self.bindings.get(identifier)
+        if stack is None:
+            self.bindings[identifier] = [symbol]
+        else:
+            stack.append(symbol)
+        scopes = self.declared_in.get(identifier)
+        if scopes is None:
+            self.declared_in[identifier] = {scope}
+        else:
+            scopes.add(scope)
         return True
 
     def addAttributeToSymbol(self, identifier, scope, attribute, value):
@@ -97,16 +286,15 @@ class SymbolTableManager:
         
         symbol = self.symbol_table[scope][identifier]
 
+        # the core attributes are fields of the symbol
+        if attribute in CORE_ATTRIBUTES:
+            setattr(symbol, attribute, value)
+            return True
+
         # update attribute within the dictionary
+        if symbol.attributes is None:
+            symbol.attributes = {}
         symbol.attributes[attribute] = value
-
-        # updating the value in accordance
-        if attribute == "type":
-            symbol.type = value
-        elif attribute == "memory_location":
-            symbol.memory_location = value
-        
-        
         return True
 
     def symbolInTable(self, identifier, scope):
@@ -120,14 +308,21 @@ class SymbolTableManager:
         """
         # search all scope
         if scope < 0:
-            for symbol_scope in self.symbol_table.values():
-                if identifier in symbol_scope:
-                    return True
-            return False
+            return identifier in self.declared_in
         # search the given scope
         else:
             return identifier in self.symbol_table.get(scope, {})
 
+    def scopesDeclaring(self, identifier):
+        """
+        every scope in the table, open or closed, with a symbol for the
+        identifier (for cross-reference listings); a dropped scope is no
+        longer one of them
+        returns:
+            set: the scope numbers, empty if none
+        """
+        return set(self.declared_in.get(identifier, ()))
+
     def getSymbol(self, identifier, scope):
         """
         locate and retrieves the SymbolInfo record for the given identifier 
@@ -143,11 +338,14 @@ class SymbolTableManager:
     def lookup(self, identifier):
         """
         look for the symbol in the scope stack from the innemost scope(bottom of the stack)
+        one probe whatever the nesting depth: the last binding of the identifier
+        is the one of the innermost open scope declaring it
         returns:
             SymbolInfo or None: The SymbolInfo record found, or None if not found
         """
-        for scope in reversed(self.scope_stack):
-            # look from the inner most scope(local)
-            if identifier in self.symbol_table.get(scope, {}):
-                return self.symbol_table[scope][identifier]
+        # identifiers from the lexer are interned (NameTable) so the probe
+        # is a cached-hash identity hit
+        stack = self.bindings.get(identifier)
+        if stack is not None:
+            return stack[-1]
         return None
@@ -0,0 +1,35 @@
+# test_lexer.py
+# identifier interning (python3 -m pytest test_lexer.py)
+from lexer import Lexer, LexerSession, ID, DD, tokenize_all
+
+SOURCE = "int i; main() { i = i + j; print i }"
+
+def ids(source):
+    tokens = []
+    while True:
+        token = source.getNextToken()
+        if token.kind == DD:
+            return tokens
+        if token.kind == ID:
+            tokens.append((token.text, token.sym))
+        else:
+            assert token.sym == -1
+
+def test_name_ids():
+    expected = [('i', 0), ('i', 0), ('i', 0), ('j', 1), ('i', 0)]
+    assert ids(Lexer(text=SOURCE)) == expected
+    assert ids(LexerSession(text=SOURCE)) == expected
+    assert ids(tokenize_all(SOURCE).reader()) == expected
+
+def test_names_shared():
+    lexer = Lexer(text=SOURCE)
+    texts = []
+    while True:
+        token = lexer.getNextToken()
+        if token.kind == DD:
+            break
+        if token.kind == ID:
+            assert token.text is lexer.names.names[token.sym]
+            texts.append(token.text)
+    assert texts[0] is texts[1] is texts[4]
+    assert lexer.names.ids == {'i': 0, 'j': 1}
@@ -0,0 +1,97 @@
+# test_modes.py
+# the compile modes of parser_main.py accept the same programs and give
+# the same output (python3 -m pytest test_modes.py)
+import os
+import subprocess
+import sys
+
+import pytest
+
+from lexer import LexerSession, tokenize_all
+from parser import Parser
+from parallel import split_program, compile_units, join
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# every mode that changes how a program is lexed or parsed; {tmp} is
+# the test's directory
+MODES = [
+    {},
+    {'RASCL_AST': '1'},
+    {'RASCL_LL': '1'},
+    {'RASCL_JOBS': '4'},
+    {'RASCL_TOKEN_CACHE': '{tmp}/tokens'},
+    {'RASCL_INCREMENTAL': '{tmp}/fragments'},
+]
+
+PROGRAMS = {
+    # f is the global variable in g, the function is declared after it
+    'global_then_function': """
+int f;
+function int g() { print f }
+function int f() { return 1 }
+main() { print 1 }
+""",
+    # calls to functions declared further on, mutual recursion
+    'forward_calls': """
+function int even(int n) {
+    if (n == 0) { return 1 };
+    return odd(n - 1)
+}
+function int odd(int n) {
+    if (n == 0) { return 0 };
+    return even(n - 1)
+}
+main() { print even(4) }
+""",
+    # a call to a name no function has
+    'undeclared_call': """
+int x;
+function int g() { return x(1) }
+main() { print 1 }
+""",
+}
+
+def compile_file(directory, text, env):
+    src = os.path.join(directory, 'p.rsc')
+    rso = os.path.join(directory, 'p.rso')
+    with open(src, 'w') as f:
+        f.write(text)
+    if os.path.exists(rso):
+        os.remove(rso)
+    environ = {name: value for name, value in os.environ.items() if not name.startswith('RASCL_')}
+    environ.update({name: value.format(tmp=directory) for name, value in env.items()})
+    run = subprocess.run([sys.executable, os.path.join(HERE, 'parser_main.py'), src],
+                         cwd=directory, env=environ, capture_output=True, text=True)
+    output = None
+    if os.path.exists(rso):
+        with open(rso) as f:
+            output = f.read()
+    return run.returncode, run.stdout, output
+
+@pytest.mark.parametrize('name', sorted(PROGRAMS))
+def test_same_result_in_every_mode(tmp_path, name):
+    text = PROGRAMS[name]
+    expected = compile_file(tmp_path, text, {})
+    for env in MODES:
+        # twice, so the cached modes also compile from their cache
+        for _ in range(2):
+            assert compile_file(tmp_path, text, env) == expected, env
+
+def test_global_then_function_compiles(tmp_path):
+    rc, stdout, output = compile_file(tmp_path, PROGRAMS['global_then_function'], {})
+    assert rc == 0
+    assert output is not None
+
+def test_functions_compiled_on_their_own():
+    # the units parsed one by one, as the parallel and incremental
+    # compiles do, give the IR of the whole program parsed in order
+    for name in ('global_then_function', 'forward_calls'):
+        text = PROGRAMS[name]
+        parser = Parser(LexerSession(text=text))
+        parser.parse_Program()
+        assert parser.errors == []
+        program = split_program(tokenize_all(text))
+        IR = join(program, compile_units(program, range(len(program.units)), 0))
+        assert IR.data_quads == parser.IR.data_quads
+        assert IR.quads == parser.IR.quads
@@ -0,0 +1,137 @@
+# test_stm.py
+# symbol table: storage layout, scope retention, scope index
+# (python3 -m pytest test_stm.py)
+from lexer import LexerSession
+from parser import Parser
+from stm import SymbolTableManager, RETAIN_FUNCTIONS, RETAIN_NONE, PARAMETER
+
+PROGRAM = """
+int g;
+int a[10];
+float m[2][3];
+
+function int f(int p, int q[]) {
+    int x;
+    float y[3];
+    return p
+}
+
+main() {
+    int k;
+    print k
+}
+"""
+
+def parse(text):
+    parser = Parser(LexerSession(text=text))
+    parser.parse_Program()
+    assert parser.errors == []
+    return parser
+
+def test_global_offsets():
+    symtab = parse(PROGRAM).symtab
+    globals = symtab.symbol_table[0]
+    # one after the other in the data segment, element size x bounds
+    assert globals['g'].offset == 0
+    assert globals['a'].offset == 4
+    assert globals['m'].offset == 44
+    assert symtab.layout.data_size == 68
+
+def test_frame_offsets():
+    symtab = parse(PROGRAM).symtab
+    f = symtab.symbol_table[1]
+    # parameters first (an array parameter is one word), then the locals
+    assert f['f'].offset is None
+    assert f['p'].offset == 0
+    assert f['q'].offset == 4
+    assert f['x'].offset == 8
+    assert f['y'].offset == 12
+    assert symtab.symbol_table[2]['k'].offset == 0
+
+def test_frame_sizes():
+    symtab = parse(PROGRAM).symtab
+    assert symtab.layout.frame_sizes == {'f': 24, 'main': 4}
+
+def test_blocks_share_frame_space():
+    symtab = SymbolTableManager()
+    symtab.enterScope('f')
+    symtab.addSymbol('p', None, kind=PARAMETER)
+    symtab.enterScope()
+    symtab.addSymbol('x', 'INT', dims=(4,))
+    symtab.exitScope()
+    symtab.enterScope()
+    symtab.addSymbol('y', 'FLOAT')
+    symtab.enterScope()
+    symtab.addSymbol('z', 'INT', dims=(2, 2))
+    assert symtab.lookup('z').offset == 8
+    symtab.exitScope()
+    symtab.exitScope()
+    symtab.exitScope()
+    assert symtab.symbol_table[2]['x'].offset == 4
+    assert symtab.symbol_table[3]['y'].offset == 4
+    # p, then the deeper of the two sibling blocks
+    assert symtab.layout.frame_sizes == {'f': 24}
+
+def test_retain_none_frees_closed_scopes():
+    parser = Parser(LexerSession(text=PROGRAM), retention=RETAIN_NONE)
+    parser.parse_Program()
+    assert parser.errors == []
+    assert list(parser.symtab.symbol_table) == [0]
+    assert parser.symtab.lookup('x') is None
+    # the layout outlives the scopes
+    assert parser.symtab.layout.frame_sizes == {'f': 24, 'main': 4}
+
+def test_compact():
+    symtab = parse(PROGRAM).symtab
+    assert sorted(symtab.symbol_table) == [0, 1, 2]
+    assert symtab.compact(RETAIN_FUNCTIONS) == 0
+    assert symtab.compact() == 2
+    assert list(symtab.symbol_table) == [0]
+    assert not symtab.symbolInTable('x', -1)
+    assert symtab.compact() == 0
+
+def test_compact_keeps_open_scopes():
+    symtab = SymbolTableManager()
+    symtab.enterScope('f')
+    symtab.enterScope()
+    symtab.exitScope()
+    assert symtab.compact() == 1
+    assert sorted(symtab.symbol_table) == [0, 1]
+
+def test_scope_listener():
+    seen = []
+    symtab = SymbolTableManager(RETAIN_FUNCTIONS)
+    def listener(scope, symbols):
+        assert symtab.symbol_table[scope] is symbols
+        seen.append((scope, sorted(symbols)))
+    symtab.addScopeListener(listener)
+    symtab.enterScope('f')
+    symtab.addSymbol('x', 'INT')
+    symtab.enterScope()
+    symtab.addSymbol('y', 'INT')
+    symtab.addSymbol('z', 'FLOAT')
+    symtab.exitScope()
+    assert seen == [(2, ['y', 'z'])]
+    symtab.exitScope()
+    assert sorted(symtab.symbol_table) == [0, 1]
+    symtab.compact()
+    assert seen == [(2, ['y', 'z']), (1, ['x'])]
+
+def test_scopes_declaring():
+    symtab = SymbolTableManager(RETAIN_FUNCTIONS)
+    symtab.addSymbol('x', 'INT')
+    symtab.enterScope('f')
+    symtab.addSymbol('x', 'INT')
+    symtab.enterScope()
+    symtab.addSymbol('x', 'FLOAT')
+    symtab.addSymbol('y', 'INT')
+    assert symtab.scopesDeclaring('x') == {0, 1, 2}
+    # the block is dropped when it is exited, the function scope is kept
+    symtab.exitScope()
+    symtab.exitScope()
+    assert symtab.scopesDeclaring('x') == {0, 1}
+    assert symtab.scopesDeclaring('y') == set()
+    assert not symtab.symbolInTable('y', -1)
+    symtab.compact()
+    assert symtab.scopesDeclaring('x') == {0}
+    assert symtab.scopesDeclaring('z') == set()
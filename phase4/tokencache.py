@@ -0,0 +1,136 @@
+# tokencache.py
+# on-disk cache of token streams (TokenBuffer) keyed by a hash of the
+# source text and the lexer version, so unchanged files are not re-lexed
+#
+# one file per source, <sha256>.tok:
+#   header : magic, byte order, item size of the offset arrays, token count
+#   body   : kinds (1 byte per token), starts, ends (array('I') bytes)
+# the cache directory is kept under max_bytes by dropping the least
+# recently used entries (a hit touches the entry's mtime)
+import hashlib
+import os
+import struct
+import sys
+
+from lexer import LEXER_VERSION, TokenBuffer, tokenize_all
+
+MAGIC = b'RTOK'
+HEADER = struct.Struct('<4sBBI')
+BYTE_ORDER = 0 if sys.byteorder == 'little' else 1
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+class TokenCache:
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    # cache key of a source text
+    def key(self, text):
+        digest = hashlib.sha256(LEXER_VERSION.encode('ascii'))
+        digest.update(text.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.tok')
+
+    # token buffer for filename, from the cache or lexed (and stored)
+    def tokens(self, filename):
+        with open(filename, 'r') as f:
+            text = f.read()
+        key = self.key(text)
+        buf = self.load(key, text)
+        if buf is None:
+            buf = tokenize_all(text)
+            self.store(key, buf)
+        return buf
+
+    # TokenBuffer over text from the entry for key, None on a miss
+    # (missing, unreadable or written on a different platform)
+    def load(self, key, text):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        buf = unpack_tokens(data, text)
+        if buf is None:
+            return None
+        # mark as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return buf
+
+    def store(self, key, buf):
+        path = self.path(key)
+        temp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp, 'wb') as f:
+                f.write(pack_tokens(buf))
+            os.replace(temp, path)
+        except OSError:
+            # the cache is only an optimization
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+            return
+        evict(self.directory, '.tok', self.max_bytes)
+
+# pack_tokens
+# the token arrays of buf as an entry: header, then body
+def pack_tokens(buf):
+    return b''.join((HEADER.pack(MAGIC, BYTE_ORDER, buf.starts.itemsize, len(buf)),
+                     buf.kinds.tobytes(), buf.starts.tobytes(), buf.ends.tobytes()))
+
+# unpack_tokens
+# TokenBuffer over text with the token arrays of an entry (bytes-like),
+# None if data is not exactly one entry written on this platform
+def unpack_tokens(data, text):
+    buf = TokenBuffer(text)
+    if len(data) < HEADER.size:
+        return None
+    magic, order, itemsize, count = HEADER.unpack_from(data)
+    if magic != MAGIC or order != BYTE_ORDER or itemsize != buf.starts.itemsize:
+        return None
+    if len(data) != HEADER.size + count * (1 + 2 * itemsize):
+        return None
+    view = memoryview(data)
+    pos = HEADER.size
+    buf.kinds.frombytes(view[pos:pos + count])
+    pos += count
+    buf.starts.frombytes(view[pos:pos + count * itemsize])
+    pos += count * itemsize
+    buf.ends.frombytes(view[pos:pos + count * itemsize])
+    return buf
+
+# evict
+# drop the least recently used entries (files ending in suffix, or in any
+# of a tuple of suffixes) of a cache directory until they fit in max_bytes
+def evict(directory, suffix, max_bytes):
+    entries = []
+    total = 0
+    with os.scandir(directory) as it:
+        for entry in it:
+            if not entry.name.endswith(suffix):
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry.path))
+            total += st.st_size
+    if total <= max_bytes:
+        return
+    entries.sort()
+    for mtime, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
@@ -0,0 +1,343 @@
+# tree.py
+# abstract syntax tree for the two-pass compile: TreeParser parses and
+# resolves names (same scopes and errors as Parser) into an Arena, and
+# codegen.CodeGenerator walks the arena to produce the IRCode
+from array import array
+from lexer import (TOKEN_NAMES, DD, ID, ICONST, FCONST, IF, ELSE, WHILE,
+                   CALL, PRINT, READ, FUNCTION, MAIN, RETURN, SEMICOLON,
+                   LPAREN, RPAREN, COMMA, LBRACE, RBRACE, LBRACKET, RBRACKET,
+                   ASSIGN, MINUS, AND, OR)
+from parser import Parser, ParseError, BINARY_OPERATORS
+from stm import RETAIN_ALL, FUNCTION as FUNCTION_SYMBOL
+
+# node kinds
+# operands per kind (a, b, c; names, types and literals are indexes into
+# Arena.values) and children
+#   PROGRAM    : -                              top-level DECL, FUNCDECL, MAINDECL
+#   DECL       : a name, b type, c element count  -
+#   FUNCDECL   : a name                         DECL and statements of the body
+#   MAINDECL   : -                              DECL and statements of the body
+#   BLOCK      : -                              statements
+#   WHILESTMT  : -                              condition, BLOCK
+#   IFSTMT     : -                              condition, BLOCK [, else BLOCK]
+#   ASSIGNSTMT : -                              VARIABLE, expression
+#   PRINTSTMT  : -                              expression
+#   READSTMT   : -                              VARIABLE
+#   RETURNSTMT : -                              [expression]
+#   CALLSTMT   : a function name                arguments
+#   BINARY     : a operator token kind          left, right
+#   NEGATE     : -                              operand
+#   INTLIT     : a value                        -
+#   FLOATLIT   : a value                        -
+#   VARIABLE   : a memory location, b type      [index expression]
+#   CALLEXPR   : a function name                arguments
+NODE_NAMES = (
+    'PROGRAM', 'DECL', 'FUNCDECL', 'MAINDECL', 'BLOCK',
+    'WHILESTMT', 'IFSTMT', 'ASSIGNSTMT', 'PRINTSTMT', 'READSTMT',
+    'RETURNSTMT', 'CALLSTMT',
+    'BINARY', 'NEGATE', 'INTLIT', 'FLOATLIT', 'VARIABLE', 'CALLEXPR'
+)
+(PROGRAM, DECL, FUNCDECL, MAINDECL, BLOCK,
+ WHILESTMT, IFSTMT, ASSIGNSTMT, PRINTSTMT, READSTMT,
+ RETURNSTMT, CALLSTMT,
+ BINARY, NEGATE, INTLIT, FLOATLIT, VARIABLE, CALLEXPR) = range(len(NODE_NAMES))
+
+class Arena:
+    """
+    the nodes of one tree, stored column-wise instead of one object per node
+    kinds    : array('B') node kind
+    a, b, c  : array('i') operands, meaning depends on the kind (see above)
+    first    : array('I') index of the node's first child in children
+    last     : array('I') index just past its last child
+    children : array('I') child node ids, each node's children contiguous
+    values   : pooled operand values (names, types, literals)
+    nodes are created children first, so a node id is always larger than
+    the ids of its children and root is the last node
+    """
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.a = array('i')
+        self.b = array('i')
+        self.c = array('i')
+        self.first = array('I')
+        self.last = array('I')
+        self.children = array('I')
+        self.values = []
+        self.pool = {}
+        self.root = -1
+
+    def __len__(self):
+        return len(self.kinds)
+
+    # index of value in values, equal values share one slot
+    def value(self, v):
+        key = (type(v), v)
+        index = self.pool.get(key)
+        if index is None:
+            index = self.pool[key] = len(self.values)
+            self.values.append(v)
+        return index
+
+    def node(self, kind, a=0, b=0, c=0, kids=()):
+        self.kinds.append(kind)
+        self.a.append(a)
+        self.b.append(b)
+        self.c.append(c)
+        children = self.children
+        self.first.append(len(children))
+        children.extend(kids)
+        self.last.append(len(children))
+        return len(self.kinds) - 1
+
+    # child ids of node n
+    def kids(self, n):
+        return self.children[self.first[n]:self.last[n]]
+
+    # operator fold for TreeParser (same signature as the IRCode emitters)
+    def binary(self, kind, left, right):
+        return self.node(BINARY, kind, kids=(left, right))
+
+# operator table for TreeParser: BINARY_OPERATORS with the operator's token
+# kind in place of the instruction, folded into BINARY nodes
+TREE_OPERATORS = {kind: (prec, right, kind, Arena.binary)
+                  for kind, (prec, right, instr, emit) in BINARY_OPERATORS.items()}
+
+class TreeParser(Parser):
+    """
+    Parser that builds an Arena instead of emitting quads
+    scopes, name lookups and errors are the Parser's, so a program is
+    accepted or rejected exactly as by the single-pass Parser; the result
+    is in self.arena (arena.root is the PROGRAM node), complete when
+    self.errors is empty
+    statements and declarations are appended to self.body, the node list
+    of the innermost open block
+    """
+
+    def __init__(self, lexer=None, functions=None, retention=RETAIN_ALL):
+        super().__init__(lexer, functions, retention)
+        self.arena = Arena()
+        self.body = None
+        self.operators = TREE_OPERATORS
+        self.target = self.arena
+
+    # parse a statement list into a node list of its own
+    def parse_body(self, parse):
+        outer = self.body
+        self.body = body = []
+        try:
+            parse()
+        finally:
+            self.body = outer
+        return body
+
+    # Program => decllist funcdecls DD
+    def parse_Program(self):
+        self.body = []
+        self.in_global = True
+        self.parse_decllist()
+        self.in_global = False
+        self.parse_funcdecls()
+        try:
+            self.match(DD)
+        except ParseError as e:
+            self.report(e)
+        self.resolve()
+        self.arena.root = self.arena.node(PROGRAM, kids=self.body)
+
+    # funcdecl => FUNCTION ftypespec simplevar fdeclparms LBRACE decllist statementlist RBRACE
+    def parse_funcdecl(self):
+        self.match(FUNCTION)
+        ret_type = self.parse_ftypespec()
+        fname = self.current.text
+        self.functions.add(fname, ret_type, pos=self.current.pos)
+        self.match(ID)
+
+        self.symtab.enterScope(fname)
+        self.symtab.addSymbol(fname, ret_type, memory_location=fname, kind=FUNCTION_SYMBOL)
+        self.parse_fdeclparms()
+        self.match(LBRACE)
+        body = self.parse_body(self.parse_block)
+        self.match(RBRACE)
+        self.symtab.exitScope()
+
+        arena = self.arena
+        self.body.append(arena.node(FUNCDECL, arena.value(fname), kids=body))
+
+    # maindecl => MAIN LPAREN RPAREN LBRACE decllist statementlist RBRACE
+    def parse_maindecl(self):
+        self.match(MAIN)
+        self.match(LPAREN)
+        self.match(RPAREN)
+        self.symtab.enterScope('main')
+
+        self.match(LBRACE)
+        body = self.parse_body(self.parse_block)
+        self.match(RBRACE)
+
+        self.symtab.exitScope()
+        self.body.append(self.arena.node(MAINDECL, kids=body))
+
+    # decllist statementlist of a function or main
+    def parse_block(self):
+        self.parse_decllist()
+        self.parse_statementlist()
+
+    # decl => typespec variablelist SEMICOLON
+    def parse_decl(self):
+        typ = TOKEN_NAMES[self.current.kind]
+        self.parse_typespec()
+        vars = self.parse_variablelist()
+        self.match(SEMICOLON)
+        arena = self.arena
+        for name,count,dims in vars:
+            self.symtab.addSymbol(name, typ, memory_location=name, dims=dims)
+            self.body.append(arena.node(DECL, arena.value(name), arena.value(typ),
+                                        arena.value(count)))
+            if self.in_global:
+                self.globals[name] = (typ, name)
+
+    # bstatementlist => LBRACE statementlist RBRACE
+    def parse_bstatementlist(self):
+        self.match(LBRACE)
+        self.symtab.enterScope()
+        body = self.parse_body(self.parse_statementlist)
+        self.symtab.exitScope()
+        self.match(RBRACE)
+        return self.arena.node(BLOCK, kids=body)
+
+    # whilestatement => WHILE relationalexpr bstatementlist
+    def parse_whilestatement(self):
+        self.match(WHILE)
+        self.match(LPAREN)
+        cond = self.parse_relationalexpr()
+        self.match(RPAREN)
+        block = self.parse_bstatementlist()
+        self.body.append(self.arena.node(WHILESTMT, kids=(cond, block)))
+
+    # ifstatement => IF relationalexpr bstatementlist istail
+    def parse_ifstatement(self):
+        arena = self.arena
+        self.match(IF)
+        self.match(LPAREN)
+        cond = self.parse_relationalexpr()
+        self.match(RPAREN)
+        # (cond) || (cond) ... folds left to right
+        while self.peek() in (OR,AND):
+            op = self.current.kind
+            self.match(op)
+            self.match(LPAREN)
+            right = self.parse_relationalexpr()
+            self.match(RPAREN)
+            cond = arena.binary(op, cond, right)
+        kids = [cond, self.parse_bstatementlist()]
+        # istail => ELSE bstatementlist | eps
+        if self.peek() == ELSE:
+            self.match(ELSE)
+            kids.append(self.parse_bstatementlist())
+        self.body.append(arena.node(IFSTMT, kids=kids))
+
+    # assignmentstatement => usevariable ASSIGN otherexpression SEMICOLON
+    def parse_assignmentstatement(self):
+        lhs = self.parse_usevariable()
+        self.match(ASSIGN)
+        rhs = self.parse_otherexpression()
+        self.body.append(self.arena.node(ASSIGNSTMT, kids=(lhs, rhs)))
+
+    # printstatement => PRINT otherexpression SEMICOLON
+    def parse_printstatement(self):
+        self.match(PRINT)
+        expr = self.parse_otherexpression()
+        self.body.append(self.arena.node(PRINTSTMT, kids=(expr,)))
+
+    # readstatement => READ usevariable SEMICOLON
+    def parse_readstatement(self):
+        self.match(READ)
+        lhs = self.parse_usevariable()
+        self.body.append(self.arena.node(READSTMT, kids=(lhs,)))
+
+    # returnstatement => RETURN [otherexpression] SEMICOLON
+    def parse_returnstatement(self):
+        self.match(RETURN)
+        kids = ()
+        if self.peek() in (ID,ICONST,FCONST,LPAREN,MINUS):
+            kids = (self.parse_otherexpression(),)
+        self.body.append(self.arena.node(RETURNSTMT, kids=kids))
+
+    # callstatement => CALL ID LPAREN [args] RPAREN SEMICOLON
+    def parse_callstatement(self):
+        self.match(CALL)
+        fname = self.current.text
+        self.match(ID)
+        self.match(LPAREN)
+        args = []
+        if self.peek() != RPAREN:
+            args.append(self.parse_otherexpression())
+            while self.peek() == COMMA:
+                self.match(COMMA)
+                args.append(self.parse_otherexpression())
+        self.match(RPAREN)
+        arena = self.arena
+        self.body.append(arena.node(CALLSTMT, arena.value(fname), kids=args))
+
+    def parse_factor(self):
+        tok = self.peek()
+        arena = self.arena
+
+        # function-call expression, or variable reference
+        if tok == ID:
+            fname = self.current.text
+            pos = self.current.pos
+            self.match(ID)
+            if not self.functions.declared(fname, pos):
+                if self.peek() != LPAREN:
+                    return self.parse_usevariable(fname)
+                self.forward_call(fname)
+            self.match(LPAREN)
+            args = []
+            if self.peek() != RPAREN:
+                args.append(self.parse_otherexpression())
+                while self.peek() == COMMA:
+                    self.match(COMMA)
+                    args.append(self.parse_otherexpression())
+            self.match(RPAREN)
+            return arena.node(CALLEXPR, arena.value(fname), kids=args)
+
+        if tok == ICONST:
+            val = int(self.current.text)
+            self.match(ICONST)
+            return arena.node(INTLIT, arena.value(val))
+
+        if tok == FCONST:
+            val = float(self.current.text)
+            self.match(FCONST)
+            return arena.node(FLOATLIT, arena.value(val))
+
+        if tok == LPAREN:
+            self.match(LPAREN)
+            expr = self.parse_otherexpression()
+            self.match(RPAREN)
+            return expr
+
+        if tok == MINUS:
+            self.match(MINUS)
+            expr = self.parse_factor()
+            return arena.node(NEGATE, kids=(expr,))
+        self.error("Expected factor")
+
+    def parse_usevariable(self, name=None):
+        if name is None:
+            name = self.current.text
+            self.match(ID)
+
+        sym = self.symtab.lookup(name)
+        if sym is None:
+            self.error(f"Undeclared variable {name}")
+        kids = ()
+        if self.peek()==LBRACKET:
+            self.match(LBRACKET)
+            kids = (self.parse_otherexpression(),)
+            self.match(RBRACKET)
+        arena = self.arena
+        return arena.node(VARIABLE, arena.value(sym.memory_location),
+                          arena.value(sym.type), kids=kids)